@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import dense
+from vector import Vector
+from linsys import LinearSystem
+from parametrization import Parametrization
+
+
+# Thread-pool batch API. Work is cut into chunks of same-shape inputs and
+# every chunk runs as one NumPy computation, which releases the GIL in
+# its array loops, so several chunks make progress at once. Chunks share
+# nothing mutable: each one builds its own arrays and result objects.
+
+DEFAULT_CHUNK_SIZE = 512
+
+
+def _workers(workers):
+    return workers or min(32, (os.cpu_count() or 1) + 4)
+
+
+def _map(fn, chunks, workers):
+    if workers == 1 or len(chunks) <= 1:
+        return [fn(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, chunks))
+
+
+def _chunks(items, chunk_size):
+    return [items[i:i+chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def _solve_chunk(chunk):
+    indices, matrices = zip(*chunk)
+    status, basepoints, directions, free = dense.parametrize_batch(np.stack(matrices))
+    results = []
+    for k, s in enumerate(status):
+        if s == dense.NO_SOLUTIONS:
+            results.append(LinearSystem.NO_SOLUTIONS_MSG)
+        elif s == dense.UNIQUE_SOLUTION:
+            results.append(Vector(basepoints[k].tolist()))
+        else:
+            results.append(Parametrization(Vector(basepoints[k].tolist()),
+                                           [Vector(d) for d in directions[k][free[k]].tolist()]))
+    return list(zip(indices, results))
+
+
+def solve_systems(systems, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # LinearSystem.solve for every system: a Vector, a Parametrization or
+    # NO_SOLUTIONS_MSG each, in input order. Systems of different shapes
+    # may be mixed; they are batched by shape. benchmark.batch_consistency_check
+    # compares the results with serial solves on random full-rank,
+    # rank-deficient and inconsistent systems of up to 40 unknowns.
+    by_shape = {}
+    for i, s in enumerate(systems):
+        matrix = dense.planes_to_matrix(getattr(s, 'planes', s))
+        by_shape.setdefault(matrix.shape, []).append((i, matrix))
+    chunks = []
+    for group in by_shape.values():
+        chunks.extend(_chunks(group, chunk_size))
+
+    results = [None]*len(systems)
+    for chunk_results in _map(_solve_chunk, chunks, _workers(workers)):
+        for i, result in chunk_results:
+            results[i] = result
+    return results
+
+
+def _same_plane_chunk(chunk):
+    # Hyperplane.same_hyperplane over arrays, with the same floating point
+    # operations in the same order, so the answers match it exactly.
+    n1, k1, n2, k2 = chunk
+    a2 = (n1*n1).sum(axis=1)
+    b2 = (n2*n2).sum(axis=1)
+    d = (n1*n2).sum(axis=1)
+    degenerate = (a2 <= 0) | (b2 <= 0)
+    parallel = degenerate | (a2*b2 - d*d <= 1e-4*1e-4*a2*b2)
+
+    zero1 = k1 == 0
+    zero2 = k2 == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s1 = n1*(1/k1)[:, np.newaxis]
+        s2 = n2*(1/k2)[:, np.newaxis]
+    scaled_equal = (s1 == s2).all(axis=1)
+    same = np.where(zero1 & zero2, True, np.where(zero1 ^ zero2, False, scaled_equal))
+    return (parallel & same).tolist()
+
+
+def same_planes(pairs, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Plane.same_plane for every (p, q) pair, in input order.
+    results = []
+    if not pairs:
+        return results
+    chunks = []
+    for chunk in _chunks(pairs, chunk_size):
+        chunks.append((
+            np.array([p.normal_vector.coordinates for p, _ in chunk], dtype=np.float64),
+            np.array([float(p.constant_term) for p, _ in chunk], dtype=np.float64),
+            np.array([q.normal_vector.coordinates for _, q in chunk], dtype=np.float64),
+            np.array([float(q.constant_term) for _, q in chunk], dtype=np.float64),
+        ))
+    for chunk_results in _map(_same_plane_chunk, chunks, _workers(workers)):
+        results.extend(chunk_results)
+    return results
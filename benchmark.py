@@ -0,0 +1,751 @@
+import os
+import random
+import time
+import tracemalloc
+from array import array
+
+from vector import Vector
+from compact_vector import CompactVector
+from plane import Plane
+from linsys import LinearSystem
+from hyperplane import Hyperplane
+
+
+# The example systems embedded at the bottom of linsys.py, as
+# (normal vectors, constant terms).
+EMBEDDED_SYSTEMS = [
+    ([[5.862,1.178,-10.366], [-2.931,-0.589,5.183]], [-8.15,-4.075]),
+    ([[8.631,5.112,-1.816], [4.315,11.132,-5.27], [-2.158,3.01,-1.727]], [-5.113,-6.775,-0.831]),
+    ([[5.262,2.739,-9.878], [5.111,6.358,7.638], [2.016,-9.924,-1.367], [2.167,-13.543,-18.883]],
+     [-3.441,-2.152,-9.278,-10.567]),
+    ([[1,1,1], [0,1,1]], [1,2]),
+    ([[1,1,1], [1,1,1]], [1,2]),
+    ([[1,1,1], [0,1,0], [1,1,-1], [1,0,-2]], [1,2,3,2]),
+    ([[0,1,1], [1,-1,1], [1,2,-5]], [1,2,3]),
+]
+
+
+def embedded_system(index, numeric=LinearSystem.LEGACY_NUMERIC):
+    normals, constants = EMBEDDED_SYSTEMS[index]
+    planes = [Plane(normal_vector=Vector(n), constant_term=k) for n, k in zip(normals, constants)]
+    return LinearSystem(planes, numeric)
+
+
+def bytes_per_vector(factory, count=10000, dimension=3, seed=0):
+    rng = random.Random(seed)
+    rows = [array('d', [rng.uniform(-10, 10) for _ in range(dimension)]) for _ in range(count)]
+
+    # tolist() hands every vector freshly boxed floats, as a parser would.
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vectors = [factory(r.tolist()) for r in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # The list holding the vectors is part of the measurement; take it out.
+    list_overhead = 8 * len(vectors) + 56
+    return (after - before - list_overhead) / float(count)
+
+
+def memory_benchmark(dimensions=(2, 3, 10, 100), count=10000):
+    results = []
+    for d in dimensions:
+        results.append({
+            'dimension': d,
+            'Vector': bytes_per_vector(Vector, count, d),
+            'CompactVector': bytes_per_vector(CompactVector, count, d),
+        })
+    return results
+
+
+def random_system(size, seed=0):
+    rng = random.Random(seed)
+    planes = [Hyperplane(normal_vector=Vector([rng.uniform(-10, 10) for _ in range(size)]),
+                         constant_term=rng.uniform(-10, 10))
+              for _ in range(size)]
+    return LinearSystem(planes)
+
+
+def _rref_rows(system):
+    return [[float(x) for x in p.normal_vector.coordinates] + [float(p.constant_term)]
+            for p in system.compute_rref().planes]
+
+
+def numeric_mode_benchmark(repeat=200):
+    modes = (LinearSystem.LEGACY_NUMERIC, LinearSystem.FLOAT_NUMERIC, LinearSystem.EXACT_NUMERIC)
+    results = []
+    for mode in modes:
+        error = 0.0
+        for i in range(len(EMBEDDED_SYSTEMS)):
+            exact = _rref_rows(embedded_system(i, LinearSystem.EXACT_NUMERIC))
+            approx = _rref_rows(embedded_system(i, mode))
+            # 0 = k rows only matter through whether k is zero, and the
+            # fraction-free mode leaves k scaled, so compare pivot rows.
+            for row_a, row_b in zip(exact, approx):
+                if not any(row_a[:-1]):
+                    continue
+                error = max(error, max(abs(a-b) for a, b in zip(row_a, row_b)))
+
+        systems = [embedded_system(i, mode) for i in range(len(EMBEDDED_SYSTEMS))]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for system in systems:
+                system.compute_rref()
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            'mode': mode,
+            'systems_per_second': repeat*len(systems)/elapsed,
+            'max_abs_error': error,
+        })
+    return results
+
+
+def _time_per_call(fn, pairs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for a, b in pairs:
+            fn(a, b)
+    return (time.perf_counter() - start)/(repeat*len(pairs))
+
+
+def predicate_benchmark(count=2000, dimension=3, repeat=5, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        a = Vector([rng.uniform(-10, 10) for _ in range(dimension)])
+        b = Vector([rng.uniform(-10, 10) for _ in range(dimension)])
+        pairs.append((a, b))
+
+    results = [
+        ('Vector.parallel', _time_per_call(Vector.parallel, pairs, repeat)),
+        ('Vector.is_parallel_to', _time_per_call(Vector.is_parallel_to, pairs, repeat)),
+        ('Vector.orthognal', _time_per_call(Vector.orthognal, pairs, repeat)),
+        ('Vector.is_orthogonal_to', _time_per_call(Vector.is_orthogonal_to, pairs, repeat)),
+    ]
+
+    try:
+        from vector_batch import VectorBatch
+    except ImportError:
+        return results
+    A = VectorBatch.from_vectors([a for a, b in pairs])
+    B = VectorBatch.from_vectors([b for a, b in pairs])
+    for name in ('parallel', 'is_parallel_to', 'orthognal', 'is_orthogonal_to'):
+        method = getattr(VectorBatch, name)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            method(A, B)
+        results.append(('VectorBatch.' + name, (time.perf_counter() - start)/(repeat*count)))
+    return results
+
+
+def _legacy_projection(x, v):
+    # Vector.parallel_projection_on before the fused kernels.
+    dir = v.times_scalar(1/v.magnitude())
+    return dir.times_scalar(x.dot_product(dir))
+
+
+def _legacy_triangle_area(x, v):
+    return x.cross_product(v).magnitude()/2
+
+
+def _legacy_row_update(system, coefficient, row_to_add, row_to_be_added_to):
+    source = system.planes[row_to_add]
+    target = system.planes[row_to_be_added_to]
+    target.constant_term = coefficient*float(source.constant_term) + float(target.constant_term)
+    target.normal_vector = source.normal_vector.times_scalar(coefficient).plus(target.normal_vector)
+
+
+def kernel_benchmark(count=2000, dimension=3, repeat=5, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        a = Vector([rng.uniform(-10, 10) for _ in range(dimension)])
+        b = Vector([rng.uniform(-10, 10) for _ in range(dimension)])
+        pairs.append((a, b))
+
+    results = [
+        ('projection', _time_per_call(_legacy_projection, pairs, repeat),
+         _time_per_call(Vector.parallel_projection_on, pairs, repeat)),
+        ('triangle area', _time_per_call(_legacy_triangle_area, pairs, repeat),
+         _time_per_call(Vector.area_of_triangle_spanned_with, pairs, repeat)),
+    ]
+
+    system = embedded_system(2)
+    calls = [(system, 0.001, i % len(system), (i+1) % len(system)) for i in range(count)]
+    start = time.perf_counter()
+    for args in calls:
+        _legacy_row_update(*args)
+    legacy = (time.perf_counter() - start)/count
+    start = time.perf_counter()
+    for s, c, i, j in calls:
+        s.add_multiple_times_row_to_row(c, i, j)
+    fused = (time.perf_counter() - start)/count
+    results.append(('row update', legacy, fused))
+    return results
+
+
+def _measure(make_system, run):
+    # Wall time and tracemalloc peak come from separate runs, since
+    # tracing slows allocation-heavy code down far more than the rest.
+    system = make_system()
+    start = time.perf_counter()
+    run(system)
+    elapsed = time.perf_counter() - start
+
+    system = make_system()
+    tracemalloc.start()
+    run(system)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def in_place_benchmark(sizes=(10, 20, 40, 80, 160)):
+    results = []
+    for n in sizes:
+        make_system = lambda: random_system(n)
+        copy_time, copy_peak = _measure(make_system, lambda s: s.compute_rref())
+        in_place_time, in_place_peak = _measure(make_system, lambda s: s.compute_rref(in_place=True))
+        results.append({
+            'size': n,
+            'copy_seconds': copy_time,
+            'copy_peak_bytes': copy_peak,
+            'in_place_seconds': in_place_time,
+            'in_place_peak_bytes': in_place_peak,
+        })
+    return results
+
+
+def parallel_benchmark(size=1000, max_workers=None, seed=0):
+    import numpy as np
+    import parallel
+
+    rng = np.random.default_rng(seed)
+    augmented = rng.uniform(-10, 10, size=(size, size+1))
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    for workers in range(1, max_workers+1):
+        start = time.perf_counter()
+        parallel.eliminate(augmented, reduced=True, workers=workers)
+        results.append((workers, time.perf_counter() - start))
+    return results
+
+
+def diagonally_dominant_system(size, symmetric=True, seed=0):
+    # Well-conditioned test systems for the iterative solvers: random
+    # off-diagonal entries and a diagonal larger than each row's sum, so
+    # the symmetric variant is positive definite.
+    rng = random.Random(seed)
+    rows = [[0.0]*size for _ in range(size)]
+    for i in range(size):
+        for j in range(i if symmetric else 0, size):
+            if i != j:
+                rows[i][j] = rng.uniform(-1, 1)
+                if symmetric:
+                    rows[j][i] = rows[i][j]
+    for i, row in enumerate(rows):
+        row[i] = sum(abs(x) for x in row) + 1
+    planes = [Hyperplane(normal_vector=Vector(row), constant_term=rng.uniform(-10, 10)) for row in rows]
+    return LinearSystem(planes)
+
+
+def iterative_benchmark(sizes=(25, 50, 100, 200, 400), tolerance=1e-10):
+    results = []
+    for n in sizes:
+        spd = diagonally_dominant_system(n)
+        general = diagonally_dominant_system(n, symmetric=False)
+        timings = {'size': n}
+        for name, run in (
+                ('solve', lambda: spd.solve()),
+                ('cg', lambda: spd.conjugate_gradient(tolerance)),
+                ('cg_jacobi', lambda: spd.conjugate_gradient(tolerance, preconditioner='jacobi')),
+                ('gmres', lambda: general.gmres(tolerance)),
+                ('gmres_jacobi', lambda: general.gmres(tolerance, preconditioner='jacobi'))):
+            start = time.perf_counter()
+            result = run()
+            timings[name] = time.perf_counter() - start
+            if name != 'solve':
+                timings[name + '_iterations'] = result.iterations
+        results.append(timings)
+    return results
+
+
+def instrumentation_benchmark(size=40, repeat=20):
+    # compute_rref timed with the instrumentation never enabled, while
+    # recording, and again after disable() has restored the methods.
+    import instrument
+
+    def timed():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            random_system(size).compute_rref()
+        return (time.perf_counter() - start)/repeat
+
+    baseline = timed()
+    with instrument.recording() as r:
+        recording = timed()
+    restored = timed()
+    return {'baseline': baseline, 'recording': recording, 'restored': restored, 'snapshot': r.snapshot()}
+
+
+def instrumentation_thread_check(threads=8, calls=2000):
+    # Records the same calls from a thread pool and counts how many the
+    # recording lost or invented.
+    import instrument
+    from concurrent.futures import ThreadPoolExecutor
+
+    def work(_):
+        for _ in range(calls):
+            Vector([1.0, 2.0]).plus(Vector([3.0, 4.0]))
+
+    with instrument.recording() as r:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(work, range(threads)))
+    snapshot = r.snapshot()
+    return {
+        'calls': abs(snapshot['calls'].get('Vector.plus', 0) - threads*calls),
+        'allocations': abs(snapshot['allocations'].get('Vector', 0) - 3*threads*calls),
+    }
+
+
+def redundant_system(size, duplicates, empty_rows, singletons, seed=0):
+    # random_system padded with rescaled copies of its own equations, all
+    # zero rows and equations fixing one fresh variable each.
+    rng = random.Random(seed)
+    base = random_system(size, seed)
+    width = size + singletons
+    planes = [Hyperplane(normal_vector=Vector(list(p.normal_vector.coordinates) + [0]*singletons),
+                         constant_term=p.constant_term) for p in base.planes]
+    for _ in range(duplicates):
+        p = planes[rng.randrange(size)]
+        c = rng.uniform(-3, 3)
+        planes.append(Hyperplane(normal_vector=p.normal_vector.times_scalar(c), constant_term=float(p.constant_term)*c))
+    planes.extend(Hyperplane(dimension=width) for _ in range(empty_rows))
+    for k in range(singletons):
+        coordinates = [0]*width
+        coordinates[size + k] = rng.uniform(1, 10)
+        planes.append(Hyperplane(normal_vector=Vector(coordinates), constant_term=rng.uniform(-10, 10)))
+    rng.shuffle(planes)
+    # The legacy elimination assumes it can pivot on the diagonal, which a
+    # shuffled system breaks, so use the partial-pivoting float mode.
+    return LinearSystem(planes, LinearSystem.FLOAT_NUMERIC)
+
+
+def presolve_benchmark(sizes=(20, 40, 80)):
+    results = []
+    for n in sizes:
+        system = redundant_system(n, duplicates=n, empty_rows=n//2, singletons=n//2)
+        start = time.perf_counter()
+        system.compute_rref()
+        direct = time.perf_counter() - start
+
+        start = time.perf_counter()
+        p = system.presolve()
+        p.system.compute_rref()
+        presolved = time.perf_counter() - start
+        results.append({
+            'rows': len(system),
+            'columns': system.dimension,
+            'removed_rows': p.removed_rows,
+            'removed_columns': p.removed_columns,
+            'direct_seconds': direct,
+            'presolved_seconds': presolved,
+        })
+    return results
+
+
+def _chain(v, others, length):
+    for k in range(length):
+        w = others[k % len(others)]
+        v = v.plus(w).times_scalar(0.5).minus(w)
+    return v
+
+
+def lazy_benchmark(dimensions=(3, 100, 10000), lengths=(1, 8, 32), seed=0):
+    # Chains of plus/times_scalar/minus (three operations per step) ending
+    # in a magnitude, and the projection and angle-family calls, eager
+    # Vector against LazyVector.
+    rng = random.Random(seed)
+    results = []
+    for d in dimensions:
+        repeat = max(1, 20000//(d*4))
+        vectors = [Vector([rng.uniform(-10, 10) for _ in range(d)]) for _ in range(4)]
+        a, others = vectors[0], vectors[1:]
+        cases = [('chain x{}'.format(3*length),
+                  lambda length=length: _chain(a, others, length).magnitude(),
+                  lambda length=length: _chain(a.lazy(), others, length).magnitude())
+                 for length in lengths]
+        cases.append(('orthognal_projection_on',
+                      lambda: a.orthognal_projection_on(others[0]).magnitude(),
+                      lambda: a.lazy().orthognal_projection_on(others[0]).magnitude()))
+        cases.append(('parallel', lambda: a.parallel(others[0]), lambda: a.lazy().parallel(others[0])))
+        for name, eager, lazy in cases:
+            timings = []
+            for run in (eager, lazy):
+                # The first lazy call compiles the kernel for its tree shape.
+                run()
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    run()
+                timings.append((time.perf_counter() - start)/repeat)
+            results.append({'dimension': d, 'case': name, 'eager_seconds': timings[0], 'lazy_seconds': timings[1]})
+    return results
+
+
+def _line_and_plane_pairs(count, seed):
+    rng = random.Random(seed)
+    lines = [(Vector([rng.uniform(-10, 10) for _ in range(2)]), rng.uniform(-10, 10),
+              Vector([rng.uniform(-10, 10) for _ in range(2)]), rng.uniform(-10, 10)) for _ in range(count)]
+    planes = []
+    for i in range(count):
+        n = Vector([rng.uniform(-10, 10) for _ in range(3)])
+        k = rng.uniform(-10, 10)
+        if i % 2:
+            c = rng.uniform(0.5, 2)
+            planes.append((n, k, n.times_scalar(c), k*c))
+        else:
+            planes.append((n, k, Vector([rng.uniform(-10, 10) for _ in range(3)]), rng.uniform(-10, 10)))
+    return lines, planes
+
+
+def intersection_benchmark(count=20000, seed=0):
+    # Construction plus Line.intersection or Plane.same_plane per pair:
+    # time per call and Vectors allocated per call. Basepoints are lazy
+    # and norms cached, so neither path builds a basepoint any more and
+    # the second parallel test inside intersection only needs a dot.
+    import io
+    from contextlib import redirect_stdout
+    import instrument
+    from line import Line
+
+    lines, planes = _line_and_plane_pairs(count, seed)
+
+    def intersect():
+        with redirect_stdout(io.StringIO()):
+            for n1, k1, n2, k2 in lines:
+                Line(n1, k1).intersection(Line(n2, k2))
+
+    def same_plane():
+        for n1, k1, n2, k2 in planes:
+            Plane(n1, k1).same_plane(Plane(n2, k2))
+
+    results = []
+    for name, run in (('Line.intersection', intersect), ('Plane.same_plane', same_plane)):
+        run()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        with instrument.recording() as r:
+            run()
+        results.append({
+            'case': name,
+            'seconds_per_call': elapsed/count,
+            'vectors_per_call': r.allocations['Vector']/float(count),
+        })
+    return results
+
+
+def storage_round_trip_check(directory=None):
+    # Saves every embedded system, loads it back and runs the default
+    # engine on both the loaded system and the mapped rows themselves.
+    # Counts the results that differ from the same system built in memory
+    # from the stored float64 values. Rows and chunks are kept past the
+    # end of the with block, which must neither fail nor invalidate them.
+    import copy
+    import tempfile
+    import storage
+
+    mismatches = {'to_linear_system': 0, 'mapped rows': 0, 'rows kept after close': 0}
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for i in range(len(EMBEDDED_SYSTEMS)):
+            path = os.path.join(tmp, 'system{}.bin'.format(i))
+            storage.save_system(path, embedded_system(i))
+            normals, constants = EMBEDDED_SYSTEMS[i]
+            expected = LinearSystem([Hyperplane.build(normal_vector=Vector([float(x) for x in n]), constant_term=float(k))
+                                     for n, k in zip(normals, constants)])
+            with storage.load_system(path) as mapped:
+                loaded = mapped.to_linear_system()
+                if (str(loaded.compute_rref()) != str(expected.compute_rref()) or
+                        str(loaded.compute_triangular_form()) != str(expected.compute_triangular_form()) or
+                        _result_key(loaded.solve()) != _result_key(expected.solve())):
+                    mismatches['to_linear_system'] += 1
+
+                rows = [mapped[r] for r in range(len(mapped))]
+                if (copy.deepcopy(rows) != list(expected.planes) or
+                        [hash(p) for p in rows] != [hash(p) for p in expected.planes] or
+                        str(LinearSystem(rows).compute_rref()) != str(expected.compute_rref())):
+                    mismatches['mapped rows'] += 1
+                for start, chunk in mapped.chunks(chunk_rows=2):
+                    pass
+            last = chunk[-1] if storage.np is not None else chunk[-(len(normals[-1]) + 1):]
+            if rows != list(expected.planes) or [float(x) for x in last] != [float(x) for x in normals[-1]] + [float(constants[-1])]:
+                mismatches['rows kept after close'] += 1
+            del rows, chunk, last
+    return mismatches
+
+
+def _result_key(result):
+    # Exact comparison key for solve results.
+    if isinstance(result, Vector):
+        return ('vector', result.coordinates)
+    if isinstance(result, str):
+        return ('status', result)
+    return ('parametrization', result.basepoint.coordinates,
+            tuple(v.coordinates for v in result.direction_vectors))
+
+
+def _mixed_systems(count, seed):
+    # Random square systems plus the embedded ones, which cover the
+    # inconsistent and infinitely-many-solutions cases.
+    systems = [random_system(3, seed + k) for k in range(count)]
+    systems.extend(embedded_system(i) for i in range(len(EMBEDDED_SYSTEMS)))
+    return systems
+
+
+def thread_stress_check(rounds=20, threads=8, seed=0):
+    # Runs the same work serially and from a thread pool and counts the
+    # results that differ. One of the pool threads lowers its own Decimal
+    # precision each round, which must not leak into anyone's output.
+    import decimal
+    from concurrent.futures import ThreadPoolExecutor
+    import batch
+    from line import Line
+
+    systems = _mixed_systems(200, seed)
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(2000):
+        n = Vector([rng.uniform(-10, 10) for _ in range(3)])
+        k = rng.uniform(-10, 10)
+        if rng.random() < 0.5:
+            c = rng.uniform(0.5, 2)
+            pairs.append((Plane(n, k), Plane(n.times_scalar(c), k*c)))
+        else:
+            pairs.append((Plane(n, k), Plane(Vector([rng.uniform(-10, 10) for _ in range(3)]), k)))
+    lines = [(Line(Vector([rng.uniform(-10, 10) for _ in range(2)]), rng.uniform(-10, 10)),
+              Line(Vector([rng.uniform(-10, 10) for _ in range(2)]), rng.uniform(-10, 10))) for _ in range(200)]
+    square = [s for s in systems if len(s) == s.dimension][:50]
+    constants = [[rng.uniform(-10, 10) for _ in range(3)] for _ in range(20)]
+
+    def per_call(task):
+        kind, i = task
+        if kind == 'solve':
+            return _result_key(systems[i].solve())
+        if kind == 'rref':
+            return str(systems[i].compute_rref())
+        if kind == 'lu':
+            s = square[i % len(square)]
+            return tuple(_result_key(v) for v in s.solve_many(constants))
+        if kind == 'line':
+            l1, l2 = lines[i]
+            return _result_key(Line(l1.normal_vector, l1.constant_term).intersection(l2) or 'none')
+        if kind == 'precision':
+            decimal.getcontext().prec = 2
+            return str(systems[i])
+
+    tasks = ([('solve', i) for i in range(len(systems))] + [('rref', i) for i in range(len(systems))] +
+             [('lu', i) for i in range(len(square))] + [('line', i) for i in range(len(lines))] +
+             [('precision', i) for i in range(0, len(systems), 10)])
+
+    import io
+    from contextlib import redirect_stdout
+    mismatches = {'batch.solve_systems': 0, 'batch.same_planes': 0, 'per-call': 0}
+    with redirect_stdout(io.StringIO()):
+        expected_calls = [per_call(t) for t in tasks]
+        decimal.getcontext().prec = 28
+        expected_solve = [_result_key(r) for r in batch.solve_systems(systems, workers=1)]
+        expected_planes = batch.same_planes(pairs, workers=1)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for r in range(rounds):
+                order = list(range(len(tasks)))
+                rng.shuffle(order)
+                results = dict(zip(order, pool.map(per_call, [tasks[i] for i in order])))
+                mismatches['per-call'] += sum(results[i] != expected_calls[i] for i in range(len(tasks)))
+
+                solved = [_result_key(x) for x in batch.solve_systems(systems, workers=threads, chunk_size=16)]
+                mismatches['batch.solve_systems'] += sum(a != b for a, b in zip(solved, expected_solve))
+                planes = batch.same_planes(pairs, workers=threads, chunk_size=64)
+                mismatches['batch.same_planes'] += sum(a != b for a, b in zip(planes, expected_planes))
+    return mismatches
+
+
+def _rank_deficient_system(size, rank, consistent, seed=0):
+    # size equations in size unknowns spanning only rank directions; the
+    # constants follow the same combinations unless the system is made
+    # inconsistent by moving one of them.
+    rng = random.Random(seed)
+    basis = [([rng.uniform(-10, 10) for _ in range(size)], rng.uniform(-10, 10)) for _ in range(rank)]
+    planes = []
+    for _ in range(size):
+        weights = [rng.uniform(-2, 2) for _ in range(rank)]
+        normal = [sum(w*b[0][j] for w, b in zip(weights, basis)) for j in range(size)]
+        planes.append(Hyperplane(normal_vector=Vector(normal),
+                                 constant_term=sum(w*b[1] for w, b in zip(weights, basis))))
+    if not consistent:
+        planes[-1] = Hyperplane(normal_vector=planes[-1].normal_vector, constant_term=planes[-1].constant_term + 1)
+    return LinearSystem(planes)
+
+
+def batch_consistency_check(sizes=(5, 10, 20, 40), count=20, seed=0):
+    # batch.solve_systems against LinearSystem.solve and batch.same_planes
+    # against Hyperplane.same_hyperplane, serially, on random systems and
+    # hyperplane pairs beyond the embedded low-dimension examples: full
+    # rank, rank deficient and inconsistent. Counts inexact results.
+    import batch
+
+    mismatches = {}
+    for size in sizes:
+        systems = [random_system(size, seed + k) for k in range(count)]
+        systems.extend(_rank_deficient_system(size, size//2, k % 2 == 0, seed + k) for k in range(count))
+        solved = batch.solve_systems(systems, workers=1)
+        mismatches['solve_systems {}'.format(size)] = sum(
+            _result_key(a) != _result_key(s.solve()) for a, s in zip(solved, systems))
+
+        rng = random.Random(seed + size)
+        pairs = []
+        for _ in range(count*10):
+            n = Vector([rng.uniform(-10, 10) for _ in range(size)])
+            k = rng.uniform(-10, 10)
+            c = rng.choice((1, -1, 0.5, 2, 3.7))
+            other = rng.choice((Hyperplane(normal_vector=n.times_scalar(c), constant_term=k*c),
+                                Hyperplane(normal_vector=n.times_scalar(c), constant_term=k*c + 1),
+                                Hyperplane(normal_vector=Vector([rng.uniform(-10, 10) for _ in range(size)]),
+                                           constant_term=k)))
+            pairs.append((Hyperplane(normal_vector=n, constant_term=k), other))
+        same = batch.same_planes(pairs, workers=1)
+        mismatches['same_planes {}'.format(size)] = sum(
+            a != p.same_hyperplane(q) for a, (p, q) in zip(same, pairs))
+    return mismatches
+
+
+def thread_scaling_benchmark(thread_counts=(1, 2, 4, 8), seed=0):
+    import batch
+
+    rng = random.Random(seed)
+    small = [random_system(3, seed + k) for k in range(20000)]
+    large = [random_system(40, seed + k) for k in range(500)]
+    pairs = []
+    for _ in range(100000):
+        n = Vector([rng.uniform(-10, 10) for _ in range(3)])
+        pairs.append((Plane(n, 1.0), Plane(n.times_scalar(2), 2.0)))
+
+    cases = [
+        ('solve_systems 3x3', lambda w: batch.solve_systems(small, workers=w)),
+        ('solve_systems 40x40', lambda w: batch.solve_systems(large, workers=w, chunk_size=32)),
+        ('same_planes', lambda w: batch.same_planes(pairs, workers=w, chunk_size=8192)),
+    ]
+    results = []
+    for name, run in cases:
+        for w in thread_counts:
+            start = time.perf_counter()
+            run(w)
+            results.append({'case': name, 'threads': w, 'seconds': time.perf_counter() - start})
+    return results
+
+
+if __name__ == '__main__':
+    print('Bytes per vector')
+    print('{:>10} {:>10} {:>14}'.format('dimension', 'Vector', 'CompactVector'))
+    for r in memory_benchmark():
+        print('{:>10} {:>10.1f} {:>14.1f}'.format(r['dimension'], r['Vector'], r['CompactVector']))
+
+    print()
+    print('RREF of the embedded linsys.py systems by numeric mode')
+    print('{:>8} {:>16} {:>14}'.format('mode', 'systems/second', 'max error'))
+    for r in numeric_mode_benchmark():
+        print('{:>8} {:>16.0f} {:>14.3g}'.format(r['mode'], r['systems_per_second'], r['max_abs_error']))
+
+    print()
+    print('Parallel/orthogonal predicates')
+    print('{:>28} {:>14}'.format('predicate', 'ns per pair'))
+    for name, seconds in predicate_benchmark():
+        print('{:>28} {:>14.1f}'.format(name, seconds*1e9))
+
+    print()
+    print('Fused pure-Python kernels')
+    print('{:>14} {:>12} {:>12} {:>9}'.format('operation', 'legacy ns', 'fused ns', 'speedup'))
+    for name, legacy, fused in kernel_benchmark():
+        print('{:>14} {:>12.1f} {:>12.1f} {:>8.2f}x'.format(name, legacy*1e9, fused*1e9, legacy/fused))
+
+    print()
+    print('compute_rref: deepcopy path against in_place=True (tracemalloc peak)')
+    print('{:>6} {:>12} {:>12} {:>14} {:>14}'.format('size', 'copy s', 'in-place s', 'copy peak KiB', 'in-place KiB'))
+    for r in in_place_benchmark():
+        print('{:>6} {:>12.4f} {:>12.4f} {:>14.1f} {:>14.1f}'.format(
+            r['size'], r['copy_seconds'], r['in_place_seconds'],
+            r['copy_peak_bytes']/1024.0, r['in_place_peak_bytes']/1024.0))
+
+    print()
+    print('Parallel block elimination of a dense 1000 x 1000 system')
+    print('{:>8} {:>10} {:>9}'.format('workers', 'seconds', 'speedup'))
+    timings = parallel_benchmark()
+    for workers, seconds in timings:
+        print('{:>8} {:>10.3f} {:>8.2f}x'.format(workers, seconds, timings[0][1]/seconds))
+
+    print()
+    print('Direct elimination (solve) against CG and GMRES, tolerance 1e-10')
+    print('{:>6} {:>10} {:>16} {:>16} {:>16} {:>16}'.format('size', 'solve s', 'cg s (its)', 'cg+jacobi s', 'gmres s (its)', 'gmres+jacobi s'))
+    for r in iterative_benchmark():
+        print('{:>6} {:>10.4f} {:>10.4f} ({:>3}) {:>10.4f} ({:>3}) {:>10.4f} ({:>3}) {:>10.4f} ({:>3})'.format(
+            r['size'], r['solve'], r['cg'], r['cg_iterations'], r['cg_jacobi'], r['cg_jacobi_iterations'],
+            r['gmres'], r['gmres_iterations'], r['gmres_jacobi'], r['gmres_jacobi_iterations']))
+
+    print()
+    print('Instrumentation overhead on compute_rref of a 40 x 40 system')
+    r = instrumentation_benchmark()
+    for name in ('baseline', 'recording', 'restored'):
+        print('{:>10} {:>10.4f} s'.format(name, r[name]))
+    for phase, stats in sorted(r['snapshot']['phases'].items()):
+        print('{:>18} {:>10.4f} s over {} calls'.format(phase, stats['seconds'], stats['calls']))
+    for method, counts in sorted(r['snapshot']['allocations_by_method'].items()):
+        print('{:>44} allocates {}'.format(method, counts))
+
+    print()
+    print('Instrumentation recorded from threads: counts lost or invented')
+    for name, count in sorted(instrumentation_thread_check().items()):
+        print('{:>20} {:>6}'.format(name, count))
+
+    print()
+    print('compute_rref with and without presolve on systems padded with duplicate, empty and singleton rows')
+    print('{:>12} {:>16} {:>10} {:>12}'.format('rows x cols', 'removed r x c', 'direct s', 'presolved s'))
+    for r in presolve_benchmark():
+        print('{:>12} {:>16} {:>10.4f} {:>12.4f}'.format(
+            '{} x {}'.format(r['rows'], r['columns']), '{} x {}'.format(r['removed_rows'], r['removed_columns']),
+            r['direct_seconds'], r['presolved_seconds']))
+
+    print()
+    print('Eager Vector against LazyVector (fused evaluation)')
+    print('{:>10} {:>24} {:>12} {:>12} {:>9}'.format('dimension', 'case', 'eager us', 'lazy us', 'speedup'))
+    for r in lazy_benchmark():
+        print('{:>10} {:>24} {:>12.1f} {:>12.1f} {:>8.2f}x'.format(
+            r['dimension'], r['case'], r['eager_seconds']*1e6, r['lazy_seconds']*1e6,
+            r['eager_seconds']/r['lazy_seconds']))
+
+    print()
+    print('Construction plus intersection/same_plane per pair')
+    print('{:>20} {:>10} {:>16}'.format('case', 'us/call', 'Vectors/call'))
+    for r in intersection_benchmark():
+        print('{:>20} {:>10.2f} {:>16.2f}'.format(r['case'], r['seconds_per_call']*1e6, r['vectors_per_call']))
+
+    print()
+    print('Storage round trip through the default engine: mismatches')
+    for name, count in sorted(storage_round_trip_check().items()):
+        print('{:>20} {:>6}'.format(name, count))
+
+    print()
+    print('Thread stress check: mismatches against serial execution')
+    for name, count in sorted(thread_stress_check().items()):
+        print('{:>20} {:>6}'.format(name, count))
+
+    print()
+    print('Batch API against serial calls: mismatches')
+    for name, count in sorted(batch_consistency_check().items()):
+        print('{:>20} {:>6}'.format(name, count))
+
+    print()
+    print('Thread-pool batch API by thread count')
+    print('{:>22} {:>8} {:>10}'.format('case', 'threads', 'seconds'))
+    for r in thread_scaling_benchmark():
+        print('{:>22} {:>8} {:>10.3f}'.format(r['case'], r['threads'], r['seconds']))
@@ -0,0 +1,346 @@
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+from vector import Vector
+from hyperplane import Hyperplane
+from plane import Plane
+from line import Line
+from linsys import LinearSystem
+from sparse import SparseEquation
+
+
+# A reproducible benchmark run: every case is timed at each of its sizes
+# on inputs drawn from a generator seeded with (seed, case, size), copied
+# afresh for every loop so no call sees another's cached results, after
+# warmup calls, over several repeats of a loop count calibrated to take
+# at least min_time seconds. Results are plain JSON and can be compared
+# against a stored baseline run.
+#
+#   python benchmark_suite.py --output run.json
+#   python benchmark_suite.py --baseline run.json --threshold 0.1
+
+VECTOR_DIMENSIONS = (2, 3, 10, 100, 1000, 10000)
+PAIR_COUNT = 64
+
+# Dense pure-Python elimination is O(n^3) in interpreted row operations,
+# so it stops at 100 unknowns and the NumPy engine at 500; the sparse
+# path carries the elimination sizes on up to 10^4.
+PYTHON_ELIMINATION_SIZES = (2, 10, 50, 100)
+NUMPY_ELIMINATION_SIZES = (2, 10, 100, 500)
+SPARSE_ELIMINATION_SIZES = (10, 100, 1000, 10000)
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def _rng(seed, name, size):
+    # String seeds hash deterministically, unlike hash() of a tuple.
+    return random.Random('{}:{}:{}'.format(seed, name, size))
+
+
+def _vector(rng, dimension):
+    return Vector([rng.uniform(-10, 10) for _ in range(dimension)])
+
+
+def _vector_pairs(rng, dimension):
+    return [(_vector(rng, dimension), _vector(rng, dimension)) for _ in range(PAIR_COUNT)]
+
+
+def _dense_system(rng, size):
+    planes = [Hyperplane(normal_vector=_vector(rng, size), constant_term=rng.uniform(-10, 10))
+              for _ in range(size)]
+    return LinearSystem(planes)
+
+
+def _banded_system(rng, size, bandwidth=2):
+    # Diagonally dominant band matrix with its unknowns shuffled, so the
+    # sparse path has to find the band itself.
+    labels = list(range(size))
+    rng.shuffle(labels)
+    equations = []
+    for i in range(size):
+        coefficients = {}
+        for j in range(max(0, i - bandwidth), min(size, i + bandwidth + 1)):
+            if j != i:
+                coefficients[labels[j]] = rng.uniform(-1, 1)
+        coefficients[labels[i]] = 2*bandwidth + 1
+        equations.append(SparseEquation(size, coefficients, rng.uniform(-10, 10)))
+    rng.shuffle(equations)
+    return LinearSystem(equations)
+
+
+def _rank_deficient_arrowhead(rng, size):
+    # Every equation couples its own unknown with the first one, and the
+    # first couples all of them: eliminating in column order fills in the
+    # whole matrix, while the Markowitz order keeps it sparse. The last
+    # equation is the sum of two others, leaving one free unknown.
+    equations = [SparseEquation(size, {j: rng.uniform(1, 2) for j in range(size)}, rng.uniform(-10, 10))]
+    for i in range(1, size - 1):
+        equations.append(SparseEquation(size, {0: rng.uniform(1, 2), i: size + rng.uniform(0, 1)},
+                                        rng.uniform(-10, 10)))
+    a, b = equations[1], equations[2]
+    coefficients = dict(a.coefficients)
+    for j, x in b.coefficients.items():
+        coefficients[j] = coefficients.get(j, 0.0) + x
+    equations.append(SparseEquation(size, coefficients, a.constant_term + b.constant_term))
+    rng.shuffle(equations)
+    return LinearSystem(equations)
+
+
+def _pairwise(method):
+    def setup(rng, size):
+        return _vector_pairs(rng, size)
+    def run(pairs):
+        for a, b in pairs:
+            method(a, b)
+    return setup, run, PAIR_COUNT
+
+
+def _unary(method):
+    def setup(rng, size):
+        return [_vector(rng, size) for _ in range(PAIR_COUNT)]
+    def run(vectors):
+        for v in vectors:
+            method(v)
+    return setup, run, PAIR_COUNT
+
+
+def _scalar(rng, size):
+    return [(_vector(rng, size), rng.uniform(-10, 10)) for _ in range(PAIR_COUNT)]
+
+
+def _times_scalar(pairs):
+    for v, c in pairs:
+        v.times_scalar(c)
+
+
+def _line_pairs(rng, size):
+    return [(Line(_vector(rng, 2), rng.uniform(-10, 10)), Line(_vector(rng, 2), rng.uniform(-10, 10)))
+            for _ in range(PAIR_COUNT)]
+
+
+def _intersect(pairs):
+    # intersection() prints its verdict; keep that out of the timings.
+    with redirect_stdout(io.StringIO()):
+        for a, b in pairs:
+            a.intersection(b)
+
+
+def _plane_pairs(rng, size):
+    pairs = []
+    for i in range(PAIR_COUNT):
+        p = Plane(_vector(rng, 3), rng.uniform(-10, 10))
+        # Every other pair is the same plane rescaled, so both outcomes
+        # of same_plane are exercised. The scales are signed powers of two,
+        # which rescale exactly: same_plane compares the normals scaled by
+        # 1/k exactly, so any rounding would turn these pairs unequal.
+        if i % 2:
+            c = rng.choice((-4.0, -0.5, 0.25, 0.5, 2.0, 8.0))
+            q = Plane(p.normal_vector.times_scalar(c), float(p.constant_term)*c)
+        else:
+            q = Plane(_vector(rng, 3), rng.uniform(-10, 10))
+        pairs.append((p, q))
+    return pairs
+
+
+def _same_plane(pairs):
+    for a, b in pairs:
+        a.same_plane(b)
+
+
+def _eliminate(method, **kwargs):
+    def run(system):
+        method(system, **kwargs)
+    return run
+
+
+# name -> (sizes, setup(rng, size) -> inputs, run(inputs), operations per run)
+CASES = {}
+
+for _name in ('plus', 'minus', 'dot_product', 'angle', 'parallel', 'orthognal', 'is_parallel_to',
+              'is_orthogonal_to', 'parallel_projection_on', 'orthognal_projection_on', '__eq__'):
+    CASES['Vector.' + _name] = (VECTOR_DIMENSIONS,) + _pairwise(getattr(Vector, _name))
+for _name in ('magnitude', 'direction'):
+    CASES['Vector.' + _name] = (VECTOR_DIMENSIONS,) + _unary(getattr(Vector, _name))
+for _name in ('cross_product', 'area_of_parallelogram_spanned_with', 'area_of_triangle_spanned_with'):
+    # Cross products only exist for two and three dimensions.
+    CASES['Vector.' + _name] = ((2, 3),) + _pairwise(getattr(Vector, _name))
+CASES['Vector.times_scalar'] = (VECTOR_DIMENSIONS, _scalar, _times_scalar, PAIR_COUNT)
+CASES['Line.intersection'] = ((2,), _line_pairs, _intersect, PAIR_COUNT)
+CASES['Plane.same_plane'] = ((3,), _plane_pairs, _same_plane, PAIR_COUNT)
+CASES['LinearSystem.compute_triangular_form'] = (
+    PYTHON_ELIMINATION_SIZES, _dense_system, _eliminate(LinearSystem.compute_triangular_form), 1)
+CASES['LinearSystem.compute_rref'] = (
+    PYTHON_ELIMINATION_SIZES, _dense_system, _eliminate(LinearSystem.compute_rref), 1)
+CASES['LinearSystem.solve'] = (
+    PYTHON_ELIMINATION_SIZES, _dense_system, _eliminate(LinearSystem.solve), 1)
+CASES['LinearSystem.compute_rref[numpy]'] = (
+    NUMPY_ELIMINATION_SIZES, _dense_system, _eliminate(LinearSystem.compute_rref, engine=LinearSystem.NUMPY_ENGINE), 1)
+CASES['LinearSystem.compute_rref[sparse]'] = (
+    SPARSE_ELIMINATION_SIZES, _banded_system, _eliminate(LinearSystem.compute_rref), 1)
+CASES['LinearSystem.compute_rref[sparse, rank-deficient]'] = (
+    SPARSE_ELIMINATION_SIZES, _rank_deficient_arrowhead, _eliminate(LinearSystem.compute_rref), 1)
+CASES['LinearSystem.compute_triangular_form[sparse, rank-deficient]'] = (
+    SPARSE_ELIMINATION_SIZES, _rank_deficient_arrowhead, _eliminate(LinearSystem.compute_triangular_form), 1)
+CASES['LinearSystem.solve[sparse, rank-deficient]'] = (
+    SPARSE_ELIMINATION_SIZES, _rank_deficient_arrowhead, _eliminate(LinearSystem.solve), 1)
+
+
+def _fresh(inputs):
+    # Vectors memoize their norms, direction and hash, and hyperplanes
+    # their basepoint, so timing the same instances again would time
+    # cache hits. Every loop gets new, equal instances instead; building
+    # them is left out of the timings.
+    if isinstance(inputs, Vector):
+        return Vector(inputs.coordinates)
+    if isinstance(inputs, Hyperplane):
+        return Hyperplane.build(normal_vector=Vector(inputs.normal_vector.coordinates),
+                                constant_term=inputs.constant_term)
+    if isinstance(inputs, (list, tuple)):
+        return type(inputs)(_fresh(x) for x in inputs)
+    return inputs
+
+
+def _time_loops(run, inputs, loops):
+    elapsed = 0.0
+    for _ in range(loops):
+        fresh = _fresh(inputs)
+        start = time.perf_counter()
+        run(fresh)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def measure(run, inputs, operations, warmup=1, repeats=5, min_time=0.05):
+    for _ in range(warmup):
+        run(_fresh(inputs))
+
+    # Double the loop count until one repeat takes at least min_time.
+    loops = 1
+    while True:
+        elapsed = _time_loops(run, inputs, loops)
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = [elapsed] + [_time_loops(run, inputs, loops) for _ in range(repeats - 1)]
+    per_op = [s/(loops*operations) for s in samples]
+    return {
+        'loops': loops,
+        'repeats': repeats,
+        'min': min(per_op),
+        'median': statistics.median(per_op),
+        'mean': statistics.mean(per_op),
+        'stdev': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+    }
+
+
+def run_suite(seed=0, warmup=1, repeats=5, min_time=0.05, max_size=None, pattern=None, progress=None):
+    results = []
+    for name in sorted(CASES):
+        if pattern and pattern not in name:
+            continue
+        sizes, setup, run, operations = CASES[name]
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                continue
+            inputs = setup(_rng(seed, name, size), size)
+            result = {'name': name, 'size': size}
+            result.update(measure(run, inputs, operations, warmup, repeats, min_time))
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'warmup': warmup,
+            'repeats': repeats,
+            'min_time': min_time,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(run, baseline, threshold=DEFAULT_THRESHOLD):
+    # Median seconds per operation against the baseline for every
+    # (name, size) both runs have; a ratio above 1 + threshold is a
+    # regression and one below 1/(1 + threshold) an improvement.
+    previous = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for r in run['results']:
+        old = previous.get((r['name'], r['size']))
+        if old is None or old['median'] <= 0:
+            continue
+        ratio = r['median']/old['median']
+        if ratio > 1 + threshold:
+            verdict = 'regression'
+        elif ratio < 1/(1 + threshold):
+            verdict = 'improvement'
+        else:
+            verdict = 'unchanged'
+        rows.append({'name': r['name'], 'size': r['size'], 'baseline': old['median'],
+                     'median': r['median'], 'ratio': ratio, 'verdict': verdict})
+    return rows
+
+
+def _format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3g} {}'.format(seconds/scale, unit)
+    return '{:.3g} ns'.format(seconds*1e9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reproducible benchmarks of the linear algebra classes.')
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--baseline', help='compare against the JSON results in this file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown counted as a regression (default 0.10)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='minimum seconds per repeat when calibrating the loop count')
+    parser.add_argument('--max-size', type=int, help='skip sizes above this')
+    parser.add_argument('--filter', help='only run cases whose name contains this')
+    args = parser.parse_args(argv)
+
+    def progress(r):
+        print('{:<44} {:>6} {:>12} +- {:>10}'.format(
+            r['name'], r['size'], _format_seconds(r['median']), _format_seconds(r['stdev'])), file=sys.stderr)
+
+    run = run_suite(args.seed, args.warmup, args.repeats, args.min_time, args.max_size, args.filter, progress)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=1)
+    else:
+        json.dump(run, sys.stdout, indent=1)
+        print()
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(run, baseline, args.threshold)
+    regressions = [r for r in rows if r['verdict'] == 'regression']
+    for r in rows:
+        if r['verdict'] != 'unchanged':
+            print('{:<11} {:<44} {:>6} {:>12} -> {:>12} ({:.2f}x)'.format(
+                r['verdict'], r['name'], r['size'], _format_seconds(r['baseline']),
+                _format_seconds(r['median']), r['ratio']), file=sys.stderr)
+    print('{} compared, {} regressions'.format(len(rows), len(regressions)), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
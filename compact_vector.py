@@ -0,0 +1,214 @@
+import math
+from array import array
+
+
+class CompactVector(object):
+
+    __slots__ = ('_data',)
+
+    BUFFER_FORMAT_MSG = 'The buffer must hold float64 values'
+
+    def __init__(self, coordinates):
+        try:
+            if isinstance(coordinates, array) and coordinates.typecode == 'd':
+                data = coordinates
+            else:
+                data = CompactVector._float64_view(coordinates)
+            if data is None:
+                data = array('d', coordinates)
+            if not len(data):
+                raise ValueError
+            self._data = data
+
+        except ValueError:
+            raise ValueError('The coordinates must be nonempty')
+
+        except TypeError:
+            raise TypeError('The coordinates must be an iterable')
+
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        # Reinterprets raw bytes (bytes, bytearray, mmap, ...) as float64
+        # coordinates without copying them.
+        view = memoryview(buffer)
+        if view.format not in ('d', '<d', '=d', '@d'):
+            if view.nbytes % 8:
+                raise ValueError(cls.BUFFER_FORMAT_MSG)
+            view = view.cast('B').cast('d')
+        return cls(view)
+
+
+    @classmethod
+    def _wrap(cls, data):
+        v = object.__new__(cls)
+        v._data = data
+        return v
+
+
+    @staticmethod
+    def _float64_view(obj):
+        try:
+            view = memoryview(obj)
+        except TypeError:
+            return None
+        if view.format not in ('d', '<d', '=d', '@d'):
+            return None
+        if view.ndim != 1:
+            view = view.cast('B').cast('d')
+        return view
+
+
+    @property
+    def coordinates(self):
+        return tuple(self._data)
+
+
+    @property
+    def dimension(self):
+        return len(self._data)
+
+
+    def memoryview(self):
+        # The portable way to reach the coordinates without copying them.
+        return memoryview(self._data)
+
+
+    def __buffer__(self, flags):
+        # Python classes can only export buffers from Python 3.12 on (PEP
+        # 688); older interpreters ignore this method and memoryview(v)
+        # raises TypeError there, so use v.memoryview() instead.
+        return memoryview(self._data)
+
+
+    def plus(self, v):
+        return CompactVector._wrap(array('d', [x+y for x,y in zip(self._data, v.coordinates)]))
+
+
+    def minus(self, v):
+        return CompactVector._wrap(array('d', [x-y for x,y in zip(self._data, v.coordinates)]))
+
+
+    def times_scalar(self, c):
+        return CompactVector._wrap(array('d', [x*c for x in self._data]))
+
+
+    def magnitude(self):
+        return math.sqrt(sum(x*x for x in self._data))
+
+
+    def direction(self):
+        mag = self.magnitude()
+        if mag == 0:
+            print("No direction")
+            return None
+        return CompactVector._wrap(array('d', [x/mag for x in self._data]))
+
+
+    def dot_product(self, v):
+        return sum(x*y for x, y in zip(self._data, v.coordinates))
+
+
+    def angle(self, v):
+        mag1 = self.magnitude()
+        mag2 = v.magnitude()
+        if (mag1==0) or (mag2==0):
+            print("No angle")
+            return None
+        val = self.dot_product(v)/(mag1*mag2)
+        return math.acos(min(1, max(-1, val)))
+
+
+    def parallel(self, v):
+        if (self.magnitude()==0) or (v.magnitude()==0):
+            return True
+        theta = self.angle(v)
+        return (abs(theta)<0.0001) or (abs(theta-math.pi)<0.0001)
+
+
+    def orthognal(self, v):
+        if (self.magnitude()==0) or (v.magnitude()==0):
+            return True
+        theta = self.angle(v)
+        return abs(theta-(math.pi/2))<0.0001
+
+
+    def _squared_terms(self, v):
+        a2 = b2 = d = 0
+        for x, y in zip(self._data, v.coordinates):
+            a2 += x*x
+            b2 += y*y
+            d += x*y
+        return a2, b2, d
+
+
+    def is_parallel_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        if (a2<=abs_tol*abs_tol) or (b2<=abs_tol*abs_tol):
+            return True
+        return a2*b2 - d*d <= rel_tol*rel_tol*a2*b2
+
+
+    def is_orthogonal_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        if (a2<=abs_tol*abs_tol) or (b2<=abs_tol*abs_tol):
+            return True
+        return d*d <= rel_tol*rel_tol*a2*b2
+
+
+    def parallel_projection_on(self, v):
+        dir = v.direction()
+        mag = self.dot_product(dir)
+        return CompactVector._wrap(array('d', [x*mag for x in dir.coordinates]))
+
+
+    def orthognal_projection_on(self, v):
+        parallel = self.parallel_projection_on(v)
+        return self.minus(parallel)
+
+
+    def cross_product(self, v):
+        a = tuple(self._data)
+        b = tuple(v.coordinates)
+        if len(a) == 2:
+            a = a + (0,)
+            b = b + (0,)
+        x = a[1]*b[2] - b[1]*a[2]
+        y = -(a[0]*b[2] - b[0]*a[2])
+        z = a[0]*b[1] - b[0]*a[1]
+        return CompactVector._wrap(array('d', (x, y, z)))
+
+
+    def area_of_parallelogram_spanned_with(self, v):
+        return self.cross_product(v).magnitude()
+
+
+    def area_of_triangle_spanned_with(self, v):
+        return self.cross_product(v).magnitude()/2
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    def __getitem__(self, i):
+        return self._data[i]
+
+
+    def __str__(self):
+        return 'Vector: {}'.format(self.coordinates)
+
+
+    def __eq__(self, v):
+        return self.coordinates == tuple(v.coordinates)
+
+
+    def __hash__(self):
+        # Equal to a Vector with the same coordinates, so hashed alike.
+        return hash(self.coordinates)
+
+
+    def __reduce__(self):
+        # Copies and pickles take the values into a private array('d'), so
+        # vectors viewing a buffer (an mmap, say) can be copied as well.
+        return (CompactVector, (array('d', self._data),))
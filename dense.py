@@ -0,0 +1,170 @@
+import numpy as np
+
+from vector import Vector
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+
+
+EPSILON = 1e-10
+
+UNIQUE_SOLUTION = 0
+NO_SOLUTIONS = 1
+INF_SOLUTIONS = 2
+
+STATUS_MESSAGES = (LinearSystem.UNIQUE_SOLUTION_MSG,
+                   LinearSystem.NO_SOLUTIONS_MSG,
+                   LinearSystem.INF_SOLUTIONS_MSG)
+
+SYSTEMS_MUST_HAVE_SAME_SHAPE_MSG = 'All systems in a batch should have the same number of equations and unknowns'
+
+
+def planes_to_matrix(planes):
+    return np.array([list(p.normal_vector.coordinates) + [float(p.constant_term)] for p in planes],
+                    dtype=np.float64)
+
+
+def stack_systems(systems):
+    # Accepts LinearSystem objects or plain lists of Line/Plane equations.
+    matrices = [planes_to_matrix(getattr(s, 'planes', s)) for s in systems]
+    try:
+        return np.stack(matrices)
+    except ValueError:
+        raise Exception(SYSTEMS_MUST_HAVE_SAME_SHAPE_MSG)
+
+
+def matrix_to_planes(matrix):
+    return [Hyperplane.build(normal_vector=Vector(row[:-1]), constant_term=row[-1]) for row in matrix.tolist()]
+
+
+def eliminate(augmented, reduced=True, eps=EPSILON):
+    # Partial-pivot Gaussian elimination on one (m x n+1) augmented matrix
+    # or on a stack of K of them shaped (K x m x n+1). Every system in the
+    # stack is reduced by the same array operations; each one keeps its
+    # own pivot row so rank-deficient systems stay in echelon layout.
+    M = np.array(augmented, dtype=np.float64)
+    single = M.ndim == 2
+    if single:
+        M = M[np.newaxis]
+
+    K, m, cols = M.shape
+    n = cols - 1
+    systems = np.arange(K)
+    rows = np.arange(m)
+    pivot_row = np.zeros(K, dtype=np.intp)
+
+    for c in range(n):
+        column = np.abs(M[:, :, c])
+        column[rows[np.newaxis, :] < pivot_row[:, np.newaxis]] = -1
+        best = column.argmax(axis=1)
+        has_pivot = column[systems, best] > eps
+        if not has_pivot.any():
+            continue
+
+        k = systems[has_pivot]
+        r = pivot_row[has_pivot]
+        b = best[has_pivot]
+        swapped = M[k, b]
+        M[k, b] = M[k, r]
+        M[k, r] = swapped
+
+        pivots = M[k, r]
+        if reduced:
+            pivots = pivots / pivots[:, c:c+1]
+            M[k, r] = pivots
+            factors = M[k, :, c]
+            factors[np.arange(len(k)), r] = 0
+        else:
+            factors = M[k, :, c] / pivots[:, c:c+1]
+            factors[rows[np.newaxis, :] <= r[:, np.newaxis]] = 0
+
+        M[k] -= factors[:, :, np.newaxis] * pivots[:, np.newaxis, :]
+        pivot_row[has_pivot] += 1
+
+    coefficients = M[:, :, :n]
+    coefficients[np.abs(coefficients) < eps] = 0
+
+    if single:
+        return M[0]
+    return M
+
+
+def compute_triangular_form(system):
+    M = eliminate(planes_to_matrix(system.planes), reduced=False)
+    return matrix_to_planes(M)
+
+
+def compute_rref(system):
+    M = eliminate(planes_to_matrix(system.planes), reduced=True)
+    return matrix_to_planes(M)
+
+
+def classify(rref, eps=EPSILON):
+    M = np.asarray(rref, dtype=np.float64)
+    single = M.ndim == 2
+    if single:
+        M = M[np.newaxis]
+
+    n = M.shape[2] - 1
+    nonzero_rows = (np.abs(M[:, :, :n]) > eps).any(axis=2)
+    inconsistent = (~nonzero_rows & (np.abs(M[:, :, n]) > eps)).any(axis=1)
+    rank = nonzero_rows.sum(axis=1)
+
+    status = np.full(M.shape[0], INF_SOLUTIONS, dtype=np.int8)
+    status[rank == n] = UNIQUE_SOLUTION
+    status[inconsistent] = NO_SOLUTIONS
+
+    # With full rank the first n rows of the RREF are the identity.
+    solutions = np.full((M.shape[0], n), np.nan)
+    unique = status == UNIQUE_SOLUTION
+    if M.shape[1] >= n:
+        solutions[unique] = M[unique, :n, n]
+
+    if single:
+        return solutions[0], status[0]
+    return solutions, status
+
+
+def solve_batch(augmented, eps=EPSILON):
+    rref = eliminate(augmented, reduced=True, eps=eps)
+    solutions, status = classify(rref, eps)
+    return rref, solutions, status
+
+
+def solve_systems(systems, eps=EPSILON):
+    rref, solutions, status = solve_batch(stack_systems(systems), eps)
+    return solutions, [STATUS_MESSAGES[s] for s in status]
+
+
+def parametrize_batch(augmented, eps=EPSILON):
+    # Solutions of K same-shape systems as arrays: basepoints (K x n) and
+    # direction vectors (K x n x n), where directions[k, f] is the
+    # direction for free variable f and free[k, f] says whether f is
+    # free. Rows for systems without solutions are NaN.
+    rref = eliminate(augmented, reduced=True, eps=eps)
+    M = rref if rref.ndim == 3 else rref[np.newaxis]
+    K, m, cols = M.shape
+    n = cols - 1
+    solutions, status = classify(M, eps)
+
+    nonzero = np.abs(M[:, :, :n]) > eps
+    has_pivot = nonzero.any(axis=2)
+    pivot_columns = nonzero.argmax(axis=2)
+    k_idx, r_idx = np.nonzero(has_pivot)
+    c_idx = pivot_columns[k_idx, r_idx]
+
+    free = np.ones((K, n), dtype=bool)
+    free[k_idx, c_idx] = False
+
+    basepoints = np.zeros((K, n))
+    basepoints[k_idx, c_idx] = M[k_idx, r_idx, n]
+
+    directions = np.zeros((K, n, n))
+    directions[k_idx, :, c_idx] = -M[k_idx, r_idx, :n]
+    directions[~free] = 0
+    f_k, f_idx = np.nonzero(free)
+    directions[f_k, f_idx, f_idx] = 1
+
+    no_solutions = status == NO_SOLUTIONS
+    basepoints[no_solutions] = np.nan
+    directions[no_solutions] = np.nan
+    return status, basepoints, directions, free
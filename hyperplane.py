@@ -0,0 +1,213 @@
+from decimal import Decimal, Context, localcontext
+from fractions import Fraction
+
+from vector import Vector
+
+# Decimal arithmetic in this package runs in a copy of this context,
+# entered per call, instead of in the thread's current context, so
+# importing the package changes no global state and concurrent callers
+# cannot see each other's precision.
+DECIMAL_CONTEXT = Context(prec=30)
+
+
+NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
+
+
+def first_nonzero_index(iterable, eps=1e-10):
+    for k, item in enumerate(iterable):
+        if item >= eps or item <= -eps:
+            return k
+    raise Exception(NO_NONZERO_ELTS_FOUND_MSG)
+
+
+class Hyperplane(object):
+
+    NO_NONZERO_ELTS_FOUND_MSG = NO_NONZERO_ELTS_FOUND_MSG
+    EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG = 'Either the dimension of the hyperplane or the normal vector must be provided'
+    NORMAL_VEC_DIM_MISMATCH_MSG = 'The normal vector does not live in the dimension of the hyperplane'
+
+    # Line and Plane register themselves here so that results built by
+    # dimension come back as the familiar specialized type.
+    specializations = {}
+
+    def __init__(self, normal_vector=None, constant_term=None, dimension=None):
+        if not dimension and not normal_vector:
+            raise Exception(self.EITHER_DIM_OR_NORMAL_VEC_MUST_BE_PROVIDED_MSG)
+
+        if not normal_vector:
+            all_zeros = [0]*dimension
+            normal_vector = Vector(all_zeros)
+        elif dimension and normal_vector.dimension != dimension:
+            raise Exception(self.NORMAL_VEC_DIM_MISMATCH_MSG)
+        self.dimension = normal_vector.dimension
+        self.normal_vector = normal_vector
+
+        if not constant_term:
+            constant_term = Decimal(0)
+        if isinstance(constant_term, Fraction):
+            self.constant_term = constant_term
+        else:
+            self.constant_term = Decimal(constant_term)
+
+
+    # The basepoint is only worked out when first asked for. Assigning a
+    # new normal vector or constant term (as the row operations in
+    # LinearSystem do) drops it, and the cached hash, again.
+
+    @property
+    def normal_vector(self):
+        return self._normal_vector
+
+
+    @normal_vector.setter
+    def normal_vector(self, v):
+        self._normal_vector = v
+        self._basepoint = self._hash = None
+        self._has_basepoint = False
+
+
+    @property
+    def constant_term(self):
+        return self._constant_term
+
+
+    @constant_term.setter
+    def constant_term(self, k):
+        self._constant_term = k
+        self._basepoint = self._hash = None
+        self._has_basepoint = False
+
+
+    @property
+    def basepoint(self):
+        if not self._has_basepoint:
+            self.set_basepoint()
+        return self._basepoint
+
+
+    @basepoint.setter
+    def basepoint(self, v):
+        self._basepoint = v
+        self._has_basepoint = True
+
+
+    @classmethod
+    def build(cls, normal_vector=None, constant_term=None, dimension=None):
+        if normal_vector:
+            dimension = normal_vector.dimension
+        specialization = cls.specializations.get(dimension)
+        if specialization is not None:
+            return specialization(normal_vector, constant_term)
+        return Hyperplane(normal_vector, constant_term, dimension)
+
+
+    def set_basepoint(self):
+        try:
+            n = self.normal_vector
+            c = self.constant_term
+            basepoint_coords = [0]*self.dimension
+
+            initial_index = first_nonzero_index(n.coordinates)
+            initial_coefficient = n.coordinates[initial_index]
+
+            basepoint_coords[initial_index] = float(c)/initial_coefficient
+            self.basepoint = Vector(basepoint_coords)
+
+        except Exception as e:
+            if str(e) == NO_NONZERO_ELTS_FOUND_MSG:
+                self.basepoint = None
+            else:
+                raise e
+
+
+    def parallel(self, h):
+        return self.normal_vector.is_parallel_to(h.normal_vector)
+
+
+    def same_hyperplane(self, h):
+        if not(self.parallel(h)):
+            return False
+        if (self.constant_term==0) and (h.constant_term==0):
+            return True
+        if (self.constant_term==0) ^ (h.constant_term==0):
+            return False
+        n1 = self.normal_vector.times_scalar(1/float(self.constant_term))
+        n2 = h.normal_vector.times_scalar(1 / float(h.constant_term))
+        return (n1 == n2)
+
+
+    def __eq__(self, h):
+        return ((self.constant_term==h.constant_term)and(self.normal_vector==h.normal_vector))
+
+
+    def __hash__(self):
+        # Consistent with the exact __eq__ above. A hyperplane used as a key
+        # must not be changed by row operations while it is one.
+        if self._hash is None:
+            self._hash = hash((self.normal_vector, self.constant_term))
+        return self._hash
+
+
+    def __str__(self):
+        with localcontext(DECIMAL_CONTEXT):
+            return self._format()
+
+
+    def _format(self):
+
+        num_decimal_places = 3
+
+        def write_coefficient(coefficient, is_initial_term=False):
+            if isinstance(coefficient, Fraction):
+                coefficient = float(coefficient)
+            coefficient = round(coefficient, num_decimal_places)
+            if coefficient % 1 == 0:
+                coefficient = int(coefficient)
+
+            output = ''
+
+            if coefficient < 0:
+                output += '-'
+            if coefficient > 0 and not is_initial_term:
+                output += '+'
+
+            if not is_initial_term:
+                output += ' '
+
+            if abs(coefficient) != 1:
+                output += '{}'.format(abs(coefficient))
+
+            return output
+
+        n = self.normal_vector.coordinates
+
+        try:
+            initial_index = first_nonzero_index(n)
+            terms = [write_coefficient(n[i], is_initial_term=(i==initial_index)) + 'x_{}'.format(i+1)
+                     for i in range(self.dimension) if round(n[i], num_decimal_places) != 0]
+            output = ' '.join(terms)
+
+        except Exception as e:
+            if str(e) == NO_NONZERO_ELTS_FOUND_MSG:
+                output = '0'
+            else:
+                raise e
+
+        constant = self.constant_term
+        if isinstance(constant, Fraction):
+            constant = float(constant)
+        constant = round(constant, num_decimal_places)
+        if constant % 1 == 0:
+            constant = int(constant)
+        output += ' = {}'.format(constant)
+
+        return output
+
+
+    first_nonzero_index = staticmethod(first_nonzero_index)
+
+
+class MyDecimal(Decimal):
+    def is_near_zero(self, eps=1e-10):
+        with localcontext(DECIMAL_CONTEXT):
+            return abs(self) < eps
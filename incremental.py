@@ -0,0 +1,97 @@
+from vector import Vector
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+
+
+class IncrementalLinearSystem(object):
+
+    ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG = LinearSystem.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG
+    NO_SOLUTIONS_MSG = LinearSystem.NO_SOLUTIONS_MSG
+    INF_SOLUTIONS_MSG = LinearSystem.INF_SOLUTIONS_MSG
+    UNIQUE_SOLUTION_MSG = LinearSystem.UNIQUE_SOLUTION_MSG
+
+    def __init__(self, dimension, equations=(), eps=1e-10):
+        self.dimension = dimension
+        self.eps = eps
+        # pivot column -> fully reduced row (coefficients then constant)
+        self.pivot_rows = {}
+        self.inconsistent = False
+        self.num_equations = 0
+        self.extend(equations)
+
+
+    def add(self, p):
+        if p.dimension != self.dimension:
+            raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
+        self.num_equations += 1
+
+        # Reduce the new row against the existing pivots: O(rank * dim).
+        row = [float(x) for x in p.normal_vector.coordinates] + [float(p.constant_term)]
+        for c, pivot_row in self.pivot_rows.items():
+            factor = row[c]
+            if factor:
+                row = [x - factor*y for x, y in zip(row, pivot_row)]
+
+        c = next((j for j in range(self.dimension) if abs(row[j]) > self.eps), None)
+        if c is None:
+            if abs(row[-1]) > self.eps:
+                self.inconsistent = True
+            return self.status()
+
+        pivot = row[c]
+        row = [x/pivot for x in row]
+        for j in range(self.dimension):
+            if abs(row[j]) <= self.eps:
+                row[j] = 0.0
+        row[c] = 1.0
+
+        # Keep the stored rows in RREF by clearing the new pivot column.
+        for k, pivot_row in self.pivot_rows.items():
+            factor = pivot_row[c]
+            if factor:
+                reduced = [x - factor*y for x, y in zip(pivot_row, row)]
+                reduced[c] = 0.0
+                self.pivot_rows[k] = reduced
+        self.pivot_rows[c] = row
+        return self.status()
+
+
+    def extend(self, equations, stop_when_inconsistent=True):
+        for p in equations:
+            self.add(p)
+            if self.inconsistent and stop_when_inconsistent:
+                break
+        return self.status()
+
+
+    @property
+    def rank(self):
+        return len(self.pivot_rows)
+
+
+    def status(self):
+        if self.inconsistent:
+            return self.NO_SOLUTIONS_MSG
+        if self.rank == self.dimension:
+            return self.UNIQUE_SOLUTION_MSG
+        return self.INF_SOLUTIONS_MSG
+
+
+    def solution(self):
+        if self.status() != self.UNIQUE_SOLUTION_MSG:
+            return None
+        return Vector([self.pivot_rows[c][-1] for c in range(self.dimension)])
+
+
+    def compute_rref(self):
+        planes = [Hyperplane.build(normal_vector=Vector(self.pivot_rows[c][:-1]), constant_term=self.pivot_rows[c][-1])
+                  for c in sorted(self.pivot_rows)]
+        if self.inconsistent:
+            planes.append(Hyperplane.build(constant_term=1, dimension=self.dimension))
+        if not planes:
+            planes.append(Hyperplane.build(dimension=self.dimension))
+        return LinearSystem(planes)
+
+
+    def __len__(self):
+        return self.num_equations
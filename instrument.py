@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import FunctionType
+
+from vector import Vector
+from hyperplane import Hyperplane
+from plane import Plane
+from line import Line
+from linsys import LinearSystem
+
+
+# Opt-in counters for the hot paths. Nothing here touches the classes
+# until enable() is called; it then swaps every method for a counting
+# wrapper and disable() puts the original functions back, so code that
+# is not being recorded runs exactly as it would without this module.
+
+ALREADY_RECORDING_MSG = 'Instrumentation is already recording'
+NOT_RECORDING_MSG = 'Instrumentation is not recording'
+
+INSTRUMENTED_CLASSES = (Vector, Hyperplane, Plane, Line, LinearSystem)
+
+# Constructors that count an allocation of type(self). Plane and Line
+# reach Hyperplane.__init__ through super(), so they are counted there.
+# Copies made by deepcopy bypass __init__ and are not counted. Each
+# allocation is also attributed to the instrumented method executing at
+# the time on the same thread, or to TOP_LEVEL outside all of them.
+ALLOCATING_CLASSES = (Vector, Hyperplane, LinearSystem)
+TOP_LEVEL = '<top level>'
+
+# Elimination phases, timed exclusively: compute_rref calls
+# compute_triangular_form first, so the time compute_rref spends outside
+# that call is the normalization and back substitution. That split only
+# exists in the python engine's out-of-place path on dense systems with
+# the legacy numeric mode; the other engines, numeric modes, in-place
+# elimination and sparse systems run the whole elimination inside one
+# call, which is timed as ENGINE_PHASE with the engine filled in.
+PHASES = {
+    'compute_triangular_form': 'triangular',
+    'compute_rref': 'back_substitution',
+}
+ENGINE_PHASE = 'elimination[{}]'
+
+
+class Recording(object):
+
+    def __init__(self):
+        self.calls = Counter()
+        self.allocations = Counter()
+        # (method, class) -> allocations of class made directly in method.
+        self.method_allocations = Counter()
+        self.phase_calls = Counter()
+        self.phase_seconds = Counter()
+        self._local = threading.local()
+        # Batch and stress runs record from many threads at once, and a
+        # Counter increment is a read followed by a write.
+        self._lock = threading.Lock()
+
+
+    def _phase_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+    def _method_stack(self):
+        stack = getattr(self._local, 'methods', None)
+        if stack is None:
+            stack = self._local.methods = []
+        return stack
+
+
+    def allocations_by_method(self):
+        out = {}
+        with self._lock:
+            for (method, cls), count in self.method_allocations.items():
+                out.setdefault(method, {})[cls] = count
+        return out
+
+
+    def snapshot(self):
+        by_method = self.allocations_by_method()
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'allocations': dict(self.allocations),
+                'allocations_by_method': by_method,
+                'phases': {phase: {'calls': self.phase_calls[phase], 'seconds': self.phase_seconds[phase]}
+                           for phase in self.phase_calls},
+            }
+
+
+    def metrics(self):
+        # The snapshot flattened into dotted metric names.
+        with self._lock:
+            return self._metrics()
+
+
+    def _metrics(self):
+        out = {}
+        for name, count in self.calls.items():
+            out['calls.' + name] = count
+        for name, count in self.allocations.items():
+            out['allocations.' + name] = count
+        for (method, cls), count in self.method_allocations.items():
+            out['allocations_by_method.{}.{}'.format(method, cls)] = count
+        for phase in self.phase_calls:
+            out['phases.{}.calls'.format(phase)] = self.phase_calls[phase]
+            out['phases.{}.seconds'.format(phase)] = self.phase_seconds[phase]
+        return out
+
+
+_active = None
+_originals = []
+
+
+def _counting(recording, name, f):
+    calls = recording.calls
+    lock = recording._lock
+    def wrapper(*args, **kwargs):
+        with lock:
+            calls[name] += 1
+        methods = recording._method_stack()
+        methods.append(name)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            methods.pop()
+    return wrapper
+
+
+def _allocating(recording, name, f):
+    allocations = recording.allocations
+    method_allocations = recording.method_allocations
+    lock = recording._lock
+    def wrapper(self, *args, **kwargs):
+        cls = type(self).__name__
+        methods = recording._method_stack()
+        with lock:
+            allocations[cls] += 1
+            method_allocations[methods[-1] if methods else TOP_LEVEL, cls] += 1
+        # Objects a constructor builds itself are attributed to it.
+        methods.append(name)
+        try:
+            return f(self, *args, **kwargs)
+        finally:
+            methods.pop()
+    return wrapper
+
+
+def _phase(system, phase, engine=LinearSystem.PYTHON_ENGINE, in_place=False, workers=None):
+    # The phase a compute_triangular_form or compute_rref call is timed
+    # as, following the dispatch in LinearSystem. is_sparse is called
+    # unwrapped so that the check itself is not counted.
+    is_sparse = getattr(LinearSystem.is_sparse, '__wrapped__', LinearSystem.is_sparse)
+    if system.planes and is_sparse(system):
+        return ENGINE_PHASE.format('sparse')
+    if engine != LinearSystem.PYTHON_ENGINE or in_place or system.numeric != LinearSystem.LEGACY_NUMERIC:
+        return ENGINE_PHASE.format(engine)
+    return phase
+
+
+def _timed(recording, name, phase, f):
+    calls = recording.calls
+    lock = recording._lock
+    def wrapper(self, *args, **kwargs):
+        with lock:
+            calls[name] += 1
+        timed_as = _phase(self, phase, *args, **kwargs)
+        stack = recording._phase_stack()
+        methods = recording._method_stack()
+        stack.append(0.0)
+        methods.append(name)
+        start = time.perf_counter()
+        try:
+            return f(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            methods.pop()
+            nested = stack.pop()
+            with lock:
+                recording.phase_seconds[timed_as] += elapsed - nested
+                recording.phase_calls[timed_as] += 1
+            if stack:
+                stack[-1] += elapsed
+    return wrapper
+
+
+def _wrap(recording, cls, name, f):
+    qualified = '{}.{}'.format(cls.__name__, name)
+    if name == '__init__':
+        wrapper = _allocating(recording, qualified, f)
+    elif cls is LinearSystem and name in PHASES:
+        wrapper = _timed(recording, qualified, PHASES[name], f)
+    else:
+        wrapper = _counting(recording, qualified, f)
+    wrapper.__name__ = f.__name__
+    wrapper.__doc__ = f.__doc__
+    wrapper.__wrapped__ = f
+    return wrapper
+
+
+def enable():
+    global _active
+    if _active is not None:
+        raise Exception(ALREADY_RECORDING_MSG)
+    recording = Recording()
+    for cls in INSTRUMENTED_CLASSES:
+        for name, f in list(vars(cls).items()):
+            if not isinstance(f, FunctionType):
+                continue
+            if name.startswith('__') and not (name == '__init__' and cls in ALLOCATING_CLASSES):
+                continue
+            _originals.append((cls, name, f))
+            setattr(cls, name, _wrap(recording, cls, name, f))
+    _active = recording
+    return recording
+
+
+def disable():
+    global _active
+    if _active is None:
+        raise Exception(NOT_RECORDING_MSG)
+    while _originals:
+        cls, name, f = _originals.pop()
+        setattr(cls, name, f)
+    recording, _active = _active, None
+    return recording
+
+
+def is_enabled():
+    return _active is not None
+
+
+def snapshot():
+    if _active is None:
+        raise Exception(NOT_RECORDING_MSG)
+    return _active.snapshot()
+
+
+@contextmanager
+def recording():
+    # with instrument.recording() as r:
+    #     system.compute_rref()
+    # r.snapshot() -> {'calls': ..., 'allocations': ...,
+    #                  'allocations_by_method': ..., 'phases': ...}
+    r = enable()
+    try:
+        yield r
+    finally:
+        disable()
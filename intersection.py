@@ -0,0 +1,68 @@
+import numpy as np
+
+
+UNIQUE = 0
+PARALLEL = 1
+COINCIDENT = 2
+
+STATUS_MESSAGES = ('Unique intersection', 'No intersection', 'Infinite intersections')
+
+
+def lines_to_arrays(lines):
+    normals = np.array([l.normal_vector.coordinates for l in lines], dtype=np.float64)
+    constants = np.array([float(l.constant_term) for l in lines], dtype=np.float64)
+    return normals, constants
+
+
+def intersect_lines(normals1, constants1, normals2, constants2, tolerance=1e-4):
+    # Pairwise intersection of lines n1.x = k1 and n2.x = k2, given as
+    # (K x 2) normal arrays and length-K constant arrays. Lines count as
+    # parallel when |det| <= tolerance * |n1| * |n2|, i.e. when the sine
+    # of the angle between them is below the tolerance, matching the
+    # 1e-4 radian threshold Vector.parallel uses.
+    n1 = np.asarray(normals1, dtype=np.float64)
+    n2 = np.asarray(normals2, dtype=np.float64)
+    k1 = np.asarray(constants1, dtype=np.float64)
+    k2 = np.asarray(constants2, dtype=np.float64)
+
+    A, B = n1[:, 0], n1[:, 1]
+    C, D = n2[:, 0], n2[:, 1]
+    det = A*D - B*C
+    mag1 = np.hypot(A, B)
+    mag2 = np.hypot(C, D)
+    parallel = np.abs(det) <= tolerance*mag1*mag2
+
+    # Parallel lines coincide when their signed distances from the
+    # origin, measured along the same unit normal, agree.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sign = np.where(A*C + B*D < 0, -1.0, 1.0)
+        d1 = k1/mag1
+        d2 = sign*k2/mag2
+        coincident = np.abs(d1 - d2) <= tolerance*np.maximum(1, np.maximum(np.abs(d1), np.abs(d2)))
+
+        points = np.empty((len(det), 2))
+        points[:, 0] = (D*k1 - B*k2)/det
+        points[:, 1] = (A*k2 - C*k1)/det
+
+    # A zero normal makes the tolerances above 0 or inf, so those lines
+    # are settled here: 0 = k with k != 0 has no points and meets
+    # nothing, and 0 = 0 holds everywhere, so it meets any other line in
+    # infinitely many points.
+    zero1 = mag1 == 0
+    zero2 = mag2 == 0
+    empty = (zero1 & (k1 != 0)) | (zero2 & (k2 != 0))
+    degenerate = zero1 | zero2
+    parallel = parallel | degenerate
+    coincident = np.where(degenerate, ~empty, coincident)
+
+    status = np.full(len(det), UNIQUE, dtype=np.int8)
+    status[parallel] = PARALLEL
+    status[parallel & coincident] = COINCIDENT
+    points[parallel] = np.nan
+    return points, status
+
+
+def intersect_line_pairs(lines1, lines2, tolerance=1e-4):
+    normals1, constants1 = lines_to_arrays(lines1)
+    normals2, constants2 = lines_to_arrays(lines2)
+    return intersect_lines(normals1, constants1, normals2, constants2, tolerance)
@@ -0,0 +1,193 @@
+import math
+
+import kernels
+from vector import Vector
+
+
+MATRIX_MUST_BE_SQUARE_MSG = 'Iterative solvers need as many equations as unknowns'
+UNKNOWN_PRECONDITIONER_MSG = 'Unknown preconditioner'
+ZERO_DIAGONAL_MSG = 'The Jacobi preconditioner needs a nonzero diagonal'
+
+JACOBI_PRECONDITIONER = 'jacobi'
+
+
+class IterativeSolution(object):
+
+    def __init__(self, solution, converged, iterations, residual_norms):
+        self.solution = solution
+        self.converged = converged
+        self.iterations = iterations
+        # Relative residual ||b - Ax|| / ||b|| after each iteration; the
+        # first entry is the residual of the starting guess.
+        self.residual_norms = residual_norms
+
+
+    def __str__(self):
+        state = 'converged' if self.converged else 'did not converge'
+        return '{} after {} iterations (relative residual {:.3g})'.format(
+            state, self.iterations, self.residual_norms[-1])
+
+
+def operator(planes):
+    # Returns (matvec, diagonal, constants) for the coefficient matrix.
+    # Each product is one dot per row, over the nonzeros only for sparse
+    # equations, so nothing about the matrix is ever factored or filled.
+    n = planes[0].dimension
+    if len(planes) != n:
+        raise Exception(MATRIX_MUST_BE_SQUARE_MSG)
+
+    constants = [float(p.constant_term) for p in planes]
+    if hasattr(planes[0], 'coefficients'):
+        rows = [tuple(p.coefficients.items()) for p in planes]
+        diagonal = [p.coefficients.get(i, 0.0) for i, p in enumerate(planes)]
+        def matvec(x):
+            return [sum(c*x[j] for j, c in row) for row in rows]
+    else:
+        rows = [[float(c) for c in p.normal_vector.coordinates] for p in planes]
+        diagonal = [row[i] for i, row in enumerate(rows)]
+        def matvec(x):
+            return [kernels.dot(row, x) for row in rows]
+    return matvec, diagonal, constants
+
+
+def _preconditioner(kind, diagonal):
+    if kind is None:
+        return lambda r: r
+    if kind != JACOBI_PRECONDITIONER:
+        raise Exception(UNKNOWN_PRECONDITIONER_MSG)
+    if any(d == 0 for d in diagonal):
+        raise Exception(ZERO_DIAGONAL_MSG)
+    inverse = [1.0/d for d in diagonal]
+    return lambda r: [a*b for a, b in zip(inverse, r)]
+
+
+def _norm(x):
+    return math.sqrt(kernels.dot(x, x))
+
+
+def _start(matvec, constants, x0):
+    n = len(constants)
+    x = [0.0]*n if x0 is None else [float(c) for c in x0.coordinates]
+    r = kernels.axpy(-1.0, matvec(x), constants) if x0 is not None else list(constants)
+    scale = _norm(constants) or 1.0
+    return x, r, scale
+
+
+def conjugate_gradient(planes, tolerance=1e-10, max_iterations=None, preconditioner=None,
+                       x0=None, callback=None):
+    # Only valid for symmetric positive definite coefficient matrices; a
+    # non-positive curvature p.Ap stops the iteration unconverged.
+    matvec, diagonal, constants = operator(planes)
+    apply_m = _preconditioner(preconditioner, diagonal)
+    max_iterations = max_iterations or 10*len(constants)
+
+    x, r, scale = _start(matvec, constants, x0)
+    residual = _norm(r)/scale
+    residual_norms = [residual]
+    converged = residual <= tolerance
+    iterations = 0
+
+    z = apply_m(r)
+    p = list(z)
+    rz = kernels.dot(r, z)
+    while not converged and iterations < max_iterations:
+        Ap = matvec(p)
+        curvature = kernels.dot(p, Ap)
+        if curvature <= 0:
+            break
+        alpha = rz/curvature
+        x = kernels.axpy(alpha, p, x)
+        r = kernels.axpy(-alpha, Ap, r)
+        iterations += 1
+
+        residual = _norm(r)/scale
+        residual_norms.append(residual)
+        if callback is not None:
+            callback(iterations, residual)
+        if residual <= tolerance:
+            converged = True
+            break
+
+        z = apply_m(r)
+        rz_next = kernels.dot(r, z)
+        p = kernels.axpy(rz_next/rz, p, z)
+        rz = rz_next
+
+    return IterativeSolution(Vector(x), converged, iterations, residual_norms)
+
+
+def gmres(planes, tolerance=1e-10, restart=30, max_iterations=None, preconditioner=None,
+          x0=None, callback=None):
+    # Restarted GMRES(m) with right preconditioning, so the residual the
+    # Givens rotations track is the residual of the original system.
+    matvec, diagonal, constants = operator(planes)
+    apply_m = _preconditioner(preconditioner, diagonal)
+    n = len(constants)
+    max_iterations = max_iterations or 10*n
+    restart = min(restart, n)
+
+    x, r, scale = _start(matvec, constants, x0)
+    residual = _norm(r)/scale
+    residual_norms = [residual]
+    converged = residual <= tolerance
+    iterations = 0
+
+    while not converged and iterations < max_iterations:
+        beta = _norm(r)
+        basis = [[a/beta for a in r]]
+        columns = []
+        cosines = []
+        sines = []
+        g = [beta]
+
+        for j in range(restart):
+            w = matvec(apply_m(basis[j]))
+            h = []
+            for v in basis:
+                hij = kernels.dot(w, v)
+                w = kernels.axpy(-hij, v, w)
+                h.append(hij)
+            h_next = _norm(w)
+
+            for i in range(j):
+                h[i], h[i+1] = cosines[i]*h[i] + sines[i]*h[i+1], -sines[i]*h[i] + cosines[i]*h[i+1]
+            denominator = math.hypot(h[j], h_next)
+            c, s = (h[j]/denominator, h_next/denominator) if denominator else (1.0, 0.0)
+            cosines.append(c)
+            sines.append(s)
+            h[j] = denominator
+            g.append(-s*g[j])
+            g[j] = c*g[j]
+            columns.append(h)
+            iterations += 1
+
+            residual = abs(g[j+1])/scale
+            residual_norms.append(residual)
+            if callback is not None:
+                callback(iterations, residual)
+            if residual <= tolerance or h_next == 0 or iterations >= max_iterations:
+                break
+            basis.append([a/h_next for a in w])
+
+        # Back substitution on the rotated Hessenberg matrix, whose
+        # columns are stored upper triangular.
+        k = len(columns)
+        y = [0.0]*k
+        for i in range(k-1, -1, -1):
+            if columns[i][i] == 0:
+                continue
+            s = g[i] - sum(columns[j][i]*y[j] for j in range(i+1, k))
+            y[i] = s/columns[i][i]
+        update = [0.0]*n
+        for yi, v in zip(y, basis):
+            update = kernels.axpy(yi, v, update)
+        x = kernels.axpy(1.0, apply_m(update), x)
+
+        # Recompute the true residual at every restart so rounding in
+        # the rotated estimate cannot accumulate across cycles.
+        r = kernels.axpy(-1.0, matvec(x), constants)
+        true_residual = _norm(r)/scale
+        residual_norms[-1] = true_residual
+        converged = true_residual <= tolerance
+
+    return IterativeSolution(Vector(x), converged, iterations, residual_norms)
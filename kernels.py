@@ -0,0 +1,59 @@
+import math
+
+
+# Fused pure-Python kernels over plain coordinate sequences. Each one
+# makes a single pass and builds at most the one list it returns, so
+# chained Vector operations do not allocate intermediate Vectors.
+
+
+def dot(x, y):
+    s = 0
+    for a, b in zip(x, y):
+        s += a*b
+    return s
+
+
+def axpy(a, x, y):
+    return [a*xi + yi for xi, yi in zip(x, y)]
+
+
+def normalized_dot(x, y):
+    xx = yy = xy = 0
+    for a, b in zip(x, y):
+        xx += a*a
+        yy += b*b
+        xy += a*b
+    if xx == 0 or yy == 0:
+        return None
+    return xy/math.sqrt(xx*yy)
+
+
+def projection(x, v):
+    vv = xv = 0
+    for a, b in zip(x, v):
+        vv += b*b
+        xv += a*b
+    if vv == 0:
+        return None
+    factor = xv/vv
+    return [factor*b for b in v]
+
+
+def rejection(x, v):
+    vv = xv = 0
+    for a, b in zip(x, v):
+        vv += b*b
+        xv += a*b
+    if vv == 0:
+        return None
+    factor = xv/vv
+    return [a - factor*b for a, b in zip(x, v)]
+
+
+def cross_magnitude(x, y):
+    if len(x) == 2:
+        return abs(x[0]*y[1] - x[1]*y[0])
+    cx = x[1]*y[2] - y[1]*x[2]
+    cy = x[0]*y[2] - y[0]*x[2]
+    cz = x[0]*y[1] - y[0]*x[1]
+    return math.sqrt(cx*cx + cy*cy + cz*cz)
@@ -0,0 +1,334 @@
+import math
+import threading
+from collections import OrderedDict
+
+from vector import Vector
+
+
+# Deferred Vector arithmetic. plus, minus and times_scalar only record a
+# node; the coordinates are produced when something needs them, by one
+# generated comprehension over all the leaves of the tree, so a chain of
+# k operations makes one pass and one list instead of k of each.
+# Reductions (magnitude, dot_product and the angle family) run fused over
+# the unevaluated trees as well, and every node keeps its coordinates and
+# squared norm once computed, so a subexpression shared by several
+# results, or a magnitude asked for twice, is only evaluated once. Within
+# a single expression, a node reached along more than one path (x.plus(x),
+# say) is evaluated on its own first and then read like a leaf, so a
+# shared subexpression is computed once and the generated code stays
+# linear in the number of distinct nodes.
+#
+# Building the tree costs a few microseconds per operation, so this pays
+# off for long chains and high dimensions; short 3-D work is faster with
+# plain Vectors.
+
+DIMENSIONS_MUST_MATCH_MSG = 'Both vectors should live in the same dimension'
+
+# Deeper trees are evaluated in stages so the generated source stays
+# well within the parser's nesting limit.
+MAX_FUSED_DEPTH = 32
+
+_LEAF = 'leaf'
+_ADD = 'add'
+_SUB = 'sub'
+_SCALE = 'scale'
+
+# Generated kernels, keyed by expression shape. Bounded, least recently
+# used first out, as a long-running process can build any number of
+# distinct shapes.
+MAX_KERNELS = 256
+
+_kernels = OrderedDict()
+_kernels_lock = threading.Lock()
+
+
+class _Node(object):
+
+    __slots__ = ('op', 'left', 'right', 'scalar', 'dimension', 'depth', 'value', 'squared_norm')
+
+    def __init__(self, op, dimension, left=None, right=None, scalar=None, value=None):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.scalar = scalar
+        self.dimension = dimension
+        self.value = value
+        self.squared_norm = None
+        if value is not None:
+            self.depth = 0
+        else:
+            self.depth = 1 + max(left.depth, right.depth if right is not None else 0)
+
+
+def _emit(node, leaves, scalars):
+    if node.value is not None:
+        index = leaves.setdefault(id(node), (len(leaves), node))[0]
+        return 'e{}'.format(index)
+    if node.op == _SCALE:
+        scalars.append(node.scalar)
+        return '({}*s{})'.format(_emit(node.left, leaves, scalars), len(scalars) - 1)
+    operator = '+' if node.op == _ADD else '-'
+    return '({}{}{})'.format(_emit(node.left, leaves, scalars), operator, _emit(node.right, leaves, scalars))
+
+
+def _kernel(kind, expressions, leaf_count, scalar_count):
+    key = (kind, expressions, leaf_count, scalar_count)
+    with _kernels_lock:
+        kernel = _kernels.get(key)
+        if kernel is not None:
+            _kernels.move_to_end(key)
+            return kernel
+
+    arguments = ', '.join(['x{}'.format(i) for i in range(leaf_count)] + ['s{}'.format(i) for i in range(scalar_count)])
+    loop = 'for {}, in zip({})'.format(', '.join('e{}'.format(i) for i in range(leaf_count)),
+                                       ', '.join('x{}'.format(i) for i in range(leaf_count)))
+    if kind == 'map':
+        body = '    return [{} {}]\n'.format(expressions[0], loop)
+    elif kind == 'norm':
+        body = ('    aa = 0.0\n'
+                '    {}:\n'
+                '        a = {}\n'
+                '        aa += a*a\n'
+                '    return aa\n').format(loop, expressions[0])
+    else:
+        # 'gram' returns the squared norms of both expressions and their
+        # dot product from the same pass.
+        body = ('    aa = bb = ab = 0.0\n'
+                '    {}:\n'
+                '        a = {}\n'
+                '        b = {}\n'
+                '        aa += a*a\n'
+                '        bb += b*b\n'
+                '        ab += a*b\n'
+                '    return aa, bb, ab\n').format(loop, expressions[0], expressions[-1])
+    namespace = {}
+    exec('def kernel({}):\n{}'.format(arguments, body), namespace)
+    kernel = namespace['kernel']
+    with _kernels_lock:
+        _kernels[key] = kernel
+        while len(_kernels) > MAX_KERNELS:
+            _kernels.popitem(last=False)
+    return kernel
+
+
+def _shared(nodes):
+    # The unevaluated nodes below (or among) nodes that are reached along
+    # more than one path, children before their parents.
+    parents = {}
+    for node in nodes:
+        parents[id(node)] = parents.get(id(node), 0) + 1
+    seen = set()
+    order = []
+    stack = [(node, False) for node in nodes]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen or node.value is not None:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        for child in (node.left, node.right):
+            if child is not None and child.value is None:
+                parents[id(child)] = parents.get(id(child), 0) + 1
+                stack.append((child, False))
+    return [node for node in order if parents[id(node)] > 1]
+
+
+def _run(kind, nodes):
+    for node in _shared(nodes):
+        _evaluate(node)
+    leaves = {}
+    scalars = []
+    expressions = tuple(_emit(node, leaves, scalars) for node in nodes)
+    ordered = sorted(leaves.values(), key=lambda entry: entry[0])
+    kernel = _kernel(kind, expressions, len(ordered), len(scalars))
+    return kernel(*([node.value for _, node in ordered] + scalars))
+
+
+def _evaluate(node):
+    if node.value is None:
+        node.value = tuple(_run('map', (node,)))
+        # The tree below is no longer needed once the values are known.
+        node.left = node.right = None
+        node.depth = 0
+    return node.value
+
+
+def _gram(a, b):
+    # (|a|^2, |b|^2, a.b) in a single fused pass over both trees.
+    aa, bb, ab = _run('gram', (a, b))
+    a.squared_norm = aa
+    b.squared_norm = bb
+    return aa, bb, ab
+
+
+def _squared_norm(node):
+    if node.squared_norm is None:
+        node.squared_norm = _run('norm', (node,))
+    return node.squared_norm
+
+
+class LazyVector(object):
+
+    def __init__(self, coordinates=None, node=None):
+        if node is None:
+            v = Vector(coordinates)
+            node = _Node(_LEAF, v.dimension, value=v.coordinates)
+        self._node = node
+
+
+    @classmethod
+    def _from(cls, v):
+        if isinstance(v, LazyVector):
+            return v._node
+        return _Node(_LEAF, v.dimension, value=tuple(v.coordinates))
+
+
+    def _combine(self, op, v=None, scalar=None):
+        left = self._node
+        right = None
+        if v is not None:
+            right = self._from(v)
+            if right.dimension != left.dimension:
+                raise ValueError(DIMENSIONS_MUST_MATCH_MSG)
+        node = _Node(op, left.dimension, left, right, scalar)
+        if node.depth > MAX_FUSED_DEPTH:
+            _evaluate(left)
+            if right is not None:
+                _evaluate(right)
+            node.depth = 1
+        return LazyVector(node=node)
+
+
+    @property
+    def coordinates(self):
+        return _evaluate(self._node)
+
+
+    @property
+    def dimension(self):
+        return self._node.dimension
+
+
+    def evaluate(self):
+        return Vector(self.coordinates)
+
+
+    def plus(self, v):
+        return self._combine(_ADD, v)
+
+
+    def minus(self, v):
+        return self._combine(_SUB, v)
+
+
+    def times_scalar(self, c):
+        return self._combine(_SCALE, scalar=c)
+
+
+    def magnitude(self):
+        return math.sqrt(_squared_norm(self._node))
+
+
+    def direction(self):
+        mag = self.magnitude()
+        if mag == 0:
+            print("No direction")
+            return None
+        return self.times_scalar(1/mag)
+
+
+    def _terms(self, v):
+        a = self._node
+        b = self._from(v)
+        if a is b:
+            aa = _squared_norm(a)
+            return aa, aa, aa
+        return _gram(a, b)
+
+
+    def dot_product(self, v):
+        return self._terms(v)[2]
+
+
+    def angle(self, v):
+        aa, bb, ab = self._terms(v)
+        if aa == 0 or bb == 0:
+            print("No angle")
+            return None
+        val = ab/math.sqrt(aa*bb)
+        if val>1:
+            val = 1
+        elif val<-1:
+            val = -1
+        return math.acos(val)
+
+
+    def parallel(self, v):
+        aa, bb, ab = self._terms(v)
+        if (aa==0) or (bb==0):
+            return True
+        theta = math.acos(max(-1, min(1, ab/math.sqrt(aa*bb))))
+        return abs(theta) < 0.0001 or abs(theta-math.pi) < 0.0001
+
+
+    def orthognal(self, v):
+        aa, bb, ab = self._terms(v)
+        if (aa==0) or (bb==0):
+            return True
+        theta = math.acos(max(-1, min(1, ab/math.sqrt(aa*bb))))
+        return abs(theta-(math.pi/2)) < 0.0001 or abs(theta-3*(math.pi/2)) < 0.0001
+
+
+    def is_parallel_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        aa, bb, ab = self._terms(v)
+        if (aa<=abs_tol*abs_tol) or (bb<=abs_tol*abs_tol):
+            return True
+        return aa*bb - ab*ab <= rel_tol*rel_tol*aa*bb
+
+
+    def is_orthogonal_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        aa, bb, ab = self._terms(v)
+        if (aa<=abs_tol*abs_tol) or (bb<=abs_tol*abs_tol):
+            return True
+        return ab*ab <= rel_tol*rel_tol*aa*bb
+
+
+    def parallel_projection_on(self, v):
+        # The projection stays lazy: only the scale factor x.v/|v|^2 needs
+        # a (fused) pass now.
+        _, vv, xv = self._terms(v)
+        if vv == 0:
+            print("No direction")
+            return None
+        w = v if isinstance(v, LazyVector) else LazyVector(node=self._from(v))
+        return w.times_scalar(xv/vv)
+
+
+    def orthognal_projection_on(self, v):
+        projection = self.parallel_projection_on(v)
+        if projection is None:
+            return None
+        return self.minus(projection)
+
+
+    def cross_product(self, v):
+        return LazyVector(self.evaluate().cross_product(Vector(v.coordinates)).coordinates)
+
+
+    def area_of_parallelogram_spanned_with(self, v):
+        return self.evaluate().area_of_parallelogram_spanned_with(Vector(v.coordinates))
+
+
+    def area_of_triangle_spanned_with(self, v):
+        return self.area_of_parallelogram_spanned_with(v)/2
+
+
+    def __str__(self):
+        return 'Vector: {}'.format(self.coordinates)
+
+
+    def __eq__(self, v):
+        return self.coordinates == tuple(v.coordinates)
@@ -1,10 +1,15 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, localcontext
 from copy import deepcopy
 
 from vector import Vector
 from plane import Plane
-
-getcontext().prec = 30
+from hyperplane import Hyperplane, DECIMAL_CONTEXT
+from lu import LUFactorization, LUCache
+from parametrization import Parametrization
+import sparse
+import numeric
+import kernels
+import iterative
 
 
 class LinearSystem(object):
@@ -12,8 +17,24 @@ class LinearSystem(object):
     ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG = 'All planes in the system should live in the same dimension'
     NO_SOLUTIONS_MSG = 'No solutions'
     INF_SOLUTIONS_MSG = 'Infinitely many solutions'
+    UNIQUE_SOLUTION_MSG = 'Unique solution'
+    UNKNOWN_ENGINE_MSG = 'Unknown elimination engine'
+    UNKNOWN_NUMERIC_MODE_MSG = 'Unknown numeric mode'
+
+    PYTHON_ENGINE = 'python'
+    NUMPY_ENGINE = 'numpy'
+    PARALLEL_ENGINE = 'parallel'
+
+    LEGACY_NUMERIC = 'legacy'
+    FLOAT_NUMERIC = 'float'
+    EXACT_NUMERIC = 'exact'
+
+    lu_cache = LUCache()
+
+    def __init__(self, planes, numeric=LEGACY_NUMERIC):
+        if numeric not in (self.LEGACY_NUMERIC, self.FLOAT_NUMERIC, self.EXACT_NUMERIC):
+            raise Exception(self.UNKNOWN_NUMERIC_MODE_MSG)
 
-    def __init__(self, planes):
         try:
             d = planes[0].dimension
             for p in planes:
@@ -21,28 +42,52 @@ class LinearSystem(object):
 
             self.planes = planes
             self.dimension = d
+            self.numeric = numeric
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
 
 
     def swap_rows(self, row1, row2):
+        self._factorization = None
         n = self.planes[row1]
         self.planes[row1] = self.planes[row2]
         self.planes[row2] = n
 
 
     def multiply_coefficient_and_row(self, coefficient, row):
+        self._factorization = None
         self.planes[row].constant_term = coefficient*float(self.planes[row].constant_term)
         self.planes[row].normal_vector = self.planes[row].normal_vector.times_scalar(coefficient)
 
 
     def add_multiple_times_row_to_row(self, coefficient, row_to_add, row_to_be_added_to):
-        self.planes[row_to_be_added_to].constant_term = coefficient * float(self.planes[row_to_add].constant_term) + float(self.planes[row_to_be_added_to].constant_term)
-        self.planes[row_to_be_added_to].normal_vector = self.planes[row_to_add].normal_vector.times_scalar(coefficient).plus(self.planes[row_to_be_added_to].normal_vector)
+        self._factorization = None
+        source = self.planes[row_to_add]
+        target = self.planes[row_to_be_added_to]
+        target.constant_term = coefficient * float(source.constant_term) + float(target.constant_term)
+        target.normal_vector = Vector(kernels.axpy(coefficient, source.normal_vector.coordinates, target.normal_vector.coordinates))
+
+
+    def compute_triangular_form(self, engine=PYTHON_ENGINE, in_place=False, workers=None):
+        if in_place:
+            if self._has_in_place_path(engine):
+                return self._eliminate_in_place(reduced=False)
+            return self._adopt(self.compute_triangular_form(engine, workers=workers))
+        if self.is_sparse():
+            return LinearSystem(sparse.compute_triangular_form(self))
+        if engine == self.NUMPY_ENGINE:
+            import dense
+            return LinearSystem(dense.compute_triangular_form(self))
+        if engine == self.PARALLEL_ENGINE:
+            import parallel
+            return LinearSystem(parallel.compute_triangular_form(self, workers))
+        if engine != self.PYTHON_ENGINE:
+            raise Exception(self.UNKNOWN_ENGINE_MSG)
+        if self.numeric != self.LEGACY_NUMERIC:
+            return self._compute_with_numeric_mode(reduced=False)
 
-
-    def compute_triangular_form(self):
         system = deepcopy(self)
         no_of_eq = len(system.planes)
         dim_of_palne = system.planes[0].dimension
@@ -61,7 +106,24 @@ class LinearSystem(object):
         return system
 
 
-    def compute_rref(self):
+    def compute_rref(self, engine=PYTHON_ENGINE, in_place=False, workers=None):
+        if in_place:
+            if self._has_in_place_path(engine):
+                return self._eliminate_in_place(reduced=True)
+            return self._adopt(self.compute_rref(engine, workers=workers))
+        if self.is_sparse():
+            return LinearSystem(sparse.compute_rref(self))
+        if engine == self.NUMPY_ENGINE:
+            import dense
+            return LinearSystem(dense.compute_rref(self))
+        if engine == self.PARALLEL_ENGINE:
+            import parallel
+            return LinearSystem(parallel.compute_rref(self, workers))
+        if engine != self.PYTHON_ENGINE:
+            raise Exception(self.UNKNOWN_ENGINE_MSG)
+        if self.numeric != self.LEGACY_NUMERIC:
+            return self._compute_with_numeric_mode(reduced=True)
+
         tf = self.compute_triangular_form()
         no_of_eq = len(tf.planes)
         dim_of_palne = tf.planes[0].dimension
@@ -77,6 +139,189 @@ class LinearSystem(object):
         return tf
 
 
+    def _has_in_place_path(self, engine):
+        # The float-list path below reproduces the default engine only:
+        # sparse equations, the other engines and the float and exact
+        # numeric modes compute their result as usual and it is then
+        # taken over by this system.
+        return engine == self.PYTHON_ENGINE and self.numeric == self.LEGACY_NUMERIC and not self.is_sparse()
+
+
+    def _adopt(self, system):
+        self._factorization = None
+        self.planes[:] = system.planes
+        return self
+
+
+    def _eliminate_in_place(self, reduced):
+        # The same row operations as the default path, carried out on one
+        # mutable float list per equation (coefficients then constant)
+        # instead of on a deepcopy with a fresh Vector and Decimal round
+        # trip per step. The rows are written back into this system's own
+        # planes at the end.
+        self._factorization = None
+        rows = [[float(x) for x in p.normal_vector.coordinates] + [float(p.constant_term)] for p in self.planes]
+        order = list(range(len(rows)))
+        no_of_eq = len(rows)
+        dim_of_palne = self.dimension
+
+        for i in range(no_of_eq):
+            if (i<dim_of_palne):
+                if (rows[i][i]==0):
+                    for j in range(i+1,no_of_eq):
+                        if (rows[j][i]!=0):
+                            rows[i], rows[j] = rows[j], rows[i]
+                            order[i], order[j] = order[j], order[i]
+                            break
+            target = rows[i]
+            for j in range(min(dim_of_palne, i)):
+                if (target[j]!=0):
+                    source = rows[j]
+                    coefficient = (-1)*target[j]/source[j]
+                    target[:] = kernels.axpy(coefficient, source, target)
+
+        if reduced:
+            for i in range(min(dim_of_palne, no_of_eq)):
+                row = rows[i]
+                if (abs(row[i])>0.0001):
+                    coefficient = 1/row[i]
+                    row[:] = [x*coefficient for x in row]
+            limit = min(dim_of_palne, no_of_eq)
+            for i in range(limit-2, -1, -1):
+                target = rows[i]
+                for j in range(i+1, limit):
+                    source = rows[j]
+                    if (source[j]!=0):
+                        coefficient = (-1)*target[j]
+                        target[:] = kernels.axpy(coefficient, source, target)
+
+        planes = [self.planes[i] for i in order]
+        for i, p in enumerate(planes):
+            row = rows[i]
+            rows[i] = None
+            p.constant_term = row.pop()
+            p.normal_vector = Vector(row)
+        self.planes[:] = planes
+        return self
+
+
+    def _compute_with_numeric_mode(self, reduced):
+        if self.numeric == self.EXACT_NUMERIC:
+            rows = numeric.augmented_rows(self.planes, numeric.to_fraction)
+            if reduced:
+                rows, pivots = numeric.bareiss_rref(rows)
+            else:
+                rows, pivots = numeric.bareiss_echelon(rows)
+        else:
+            rows = numeric.augmented_rows(self.planes, float)
+            rows, pivots = numeric.float_echelon(rows, reduced)
+
+        planes = [Hyperplane.build(normal_vector=Vector(row[:-1]), constant_term=row[-1]) for row in rows]
+        return LinearSystem(planes, self.numeric)
+
+
+    def is_sparse(self):
+        return isinstance(self.planes[0], sparse.SparseEquation)
+
+
+    def factorization(self):
+        if self._factorization is None:
+            key = tuple(p.normal_vector.coordinates for p in self.planes)
+            factorization = self.lu_cache.get(key)
+            if factorization is None:
+                factorization = LUFactorization(key)
+                self.lu_cache.put(key, factorization)
+            self._factorization = factorization
+        return self._factorization
+
+
+    def solve(self, constants=None):
+        if constants is not None:
+            return Vector(self.factorization().solve(constants))
+
+        if self.is_sparse():
+            # Any set of pivots gives a valid parametrization, so the one
+            # the fill-reducing order found is used as it is.
+            return self._extract_sparse_solution(*sparse.reduce_rows(self, variable_order=False))
+        if self.numeric == self.EXACT_NUMERIC:
+            rows, pivots = numeric.bareiss_rref(numeric.augmented_rows(self.planes, numeric.to_fraction))
+        else:
+            rows, pivots = numeric.float_echelon(numeric.augmented_rows(self.planes, float))
+        return self._extract_solution(rows, pivots)
+
+
+    def _extract_solution(self, rows, pivots):
+        n = self.dimension
+        rank = len(pivots)
+        for row in rows[rank:]:
+            if abs(row[-1]) > numeric.EPSILON:
+                return self.NO_SOLUTIONS_MSG
+
+        basepoint = [0]*n
+        for r, c in enumerate(pivots):
+            basepoint[c] = rows[r][-1]
+        if rank == n:
+            return Vector(basepoint)
+
+        direction_vectors = []
+        pivot_columns = set(pivots)
+        for f in range(n):
+            if f in pivot_columns:
+                continue
+            direction = [0]*n
+            direction[f] = 1
+            for r, c in enumerate(pivots):
+                direction[c] = -rows[r][f]
+            direction_vectors.append(Vector(direction))
+        return Parametrization(Vector(basepoint), direction_vectors)
+
+
+    def _extract_sparse_solution(self, rows, constants, pivots):
+        # _extract_solution over the RREF of a sparse system, visiting only
+        # its stored entries.
+        n = self.dimension
+        pivot_rows = set(r for r, c in pivots)
+        for r, k in enumerate(constants):
+            if r not in pivot_rows and abs(k) > numeric.EPSILON:
+                return self.NO_SOLUTIONS_MSG
+
+        basepoint = [0]*n
+        for r, c in pivots:
+            basepoint[c] = constants[r]
+        if len(pivots) == n:
+            return Vector(basepoint)
+
+        pivot_columns = set(c for r, c in pivots)
+        directions = {}
+        for f in range(n):
+            if f not in pivot_columns:
+                directions[f] = [0]*n
+                directions[f][f] = 1
+        for r, c in pivots:
+            for f, a in rows[r].items():
+                if f != c:
+                    directions[f][c] = -a
+        return Parametrization(Vector(basepoint), [Vector(directions[f]) for f in sorted(directions)])
+
+
+    def presolve(self, eps=numeric.EPSILON, tolerance=1e-9):
+        from presolve import Presolve
+        return Presolve(self, eps, tolerance)
+
+
+    def solve_many(self, constant_matrix):
+        factorization = self.factorization()
+        return [Vector(factorization.solve(c)) for c in constant_matrix]
+
+
+    def conjugate_gradient(self, tolerance=1e-10, max_iterations=None, preconditioner=None, x0=None, callback=None):
+        return iterative.conjugate_gradient(self.planes, tolerance, max_iterations, preconditioner, x0, callback)
+
+
+    def gmres(self, tolerance=1e-10, restart=30, max_iterations=None, preconditioner=None, x0=None, callback=None):
+        return iterative.gmres(self.planes, tolerance, restart, max_iterations, preconditioner, x0, callback)
+
+
     def indices_of_first_nonzero_terms_in_each_row(self):
         num_equations = len(self)
         num_variables = self.dimension
@@ -85,7 +330,10 @@ class LinearSystem(object):
 
         for i,p in enumerate(self.planes):
             try:
-                indices[i] = p.first_nonzero_index(p.normal_vector.coordinates)
+                if isinstance(p, sparse.SparseEquation):
+                    indices[i] = p.first_nonzero_index()
+                else:
+                    indices[i] = p.first_nonzero_index(p.normal_vector.coordinates)
             except Exception as e:
                 if str(e) == Plane.NO_NONZERO_ELTS_FOUND_MSG:
                     continue
@@ -107,6 +355,7 @@ class LinearSystem(object):
         try:
             assert x.dimension == self.dimension
             self.planes[i] = x
+            self._factorization = None
 
         except AssertionError:
             raise Exception(self.ALL_PLANES_MUST_BE_IN_SAME_DIM_MSG)
@@ -121,7 +370,8 @@ class LinearSystem(object):
 
 class MyDecimal(Decimal):
     def is_near_zero(self, eps=1e-10):
-        return abs(self) < eps
+        with localcontext(DECIMAL_CONTEXT):
+            return abs(self) < eps
 
 
 '''
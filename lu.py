@@ -0,0 +1,112 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+class LUFactorization(object):
+
+    MATRIX_MUST_BE_SQUARE_MSG = 'LU factorization needs as many equations as unknowns'
+    SINGULAR_MATRIX_MSG = 'The coefficient matrix is singular'
+
+    def __init__(self, rows, eps=1e-10):
+        n = len(rows)
+        for r in rows:
+            if len(r) != n:
+                raise Exception(self.MATRIX_MUST_BE_SQUARE_MSG)
+
+        # Doolittle factorization with partial pivoting, L and U packed
+        # into one matrix (L has an implicit unit diagonal).
+        lu = [[float(x) for x in r] for r in rows]
+        permutation = list(range(n))
+        for k in range(n):
+            p = max(range(k, n), key=lambda i: abs(lu[i][k]))
+            if abs(lu[p][k]) < eps:
+                raise Exception(self.SINGULAR_MATRIX_MSG)
+            if p != k:
+                lu[k], lu[p] = lu[p], lu[k]
+                permutation[k], permutation[p] = permutation[p], permutation[k]
+
+            pivot_row = lu[k]
+            pivot = pivot_row[k]
+            for i in range(k+1, n):
+                row = lu[i]
+                factor = row[k]/pivot
+                row[k] = factor
+                if factor:
+                    for j in range(k+1, n):
+                        row[j] -= factor*pivot_row[j]
+
+        self.lu = lu
+        self.permutation = permutation
+        self.dimension = n
+        self.nbytes = sys.getsizeof(lu) + sum(sys.getsizeof(r) + 24*n for r in lu) + sys.getsizeof(permutation)
+
+
+    def solve(self, constants):
+        n = self.dimension
+        lu = self.lu
+        y = [float(constants[p]) for p in self.permutation]
+
+        for i in range(n):
+            row = lu[i]
+            s = y[i]
+            for j in range(i):
+                s -= row[j]*y[j]
+            y[i] = s
+
+        for i in range(n-1, -1, -1):
+            row = lu[i]
+            s = y[i]
+            for j in range(i+1, n):
+                s -= row[j]*y[j]
+            y[i] = s/row[i]
+
+        return y
+
+
+class LUCache(object):
+
+    def __init__(self, max_entries=128, max_bytes=64*1024*1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        # One cache is shared by every LinearSystem, possibly from several
+        # threads, and the LRU reordering is not atomic.
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            factorization = self.entries.get(key)
+            if factorization is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return factorization
+
+
+    def put(self, key, factorization):
+        if factorization.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key).nbytes
+            self.entries[key] = factorization
+            self.nbytes += factorization.nbytes
+            while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+    def __len__(self):
+        return len(self.entries)
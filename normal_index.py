@@ -0,0 +1,168 @@
+import math
+
+
+def canonical_scale(coordinates):
+    # The factor, +-1/|n|, taking the normal n to the unit normal whose
+    # largest coordinate is positive, so n and -n (and any rescaling) get
+    # the same one; None for a zero normal. The largest coordinate is at
+    # least 1/sqrt(d) in size, far from the zero crossing where nearby
+    # normals would flip differently.
+    mag = math.sqrt(sum(x*x for x in coordinates))
+    if mag == 0:
+        return None
+    return (1.0 if max(coordinates, key=abs) > 0 else -1.0)/mag
+
+
+class NormalIndex(object):
+
+    def __init__(self, hyperplanes=(), tolerance=1e-4):
+        self.tolerance = tolerance
+        self.hyperplanes = []
+        self._directions = []
+        self._offsets = []
+        self._buckets = {}
+        self._projections = {}
+        self._classes = []
+        self._class_of = []
+        for h in hyperplanes:
+            self.add(h)
+
+
+    def _canonical(self, h):
+        # The canonical unit normal, with the constant scaled alongside
+        # to the signed distance from the origin.
+        coordinates = [float(x) for x in h.normal_vector.coordinates]
+        scale = canonical_scale(coordinates)
+        if scale is None:
+            return None, None
+        return tuple(x*scale for x in coordinates), float(h.constant_term)*scale
+
+
+    def _ambiguous(self, direction):
+        # When the two largest coordinates are within the tolerance in
+        # size, a matching normal may have been flipped the other way.
+        if len(direction) < 2:
+            return False
+        first, second = sorted((abs(x) for x in direction), reverse=True)[:2]
+        return first - second <= 2*self.tolerance
+
+
+    def _weights(self, dimension):
+        # Directions are bucketed by their projection on a fixed vector
+        # with distinct weights and unit 1-norm: directions within the
+        # tolerance in every coordinate project within the tolerance of
+        # each other, so three neighbouring buckets cover every match
+        # whatever the dimension.
+        weights = self._projections.get(dimension)
+        if weights is None:
+            weights = [math.sqrt(i + 2) for i in range(dimension)]
+            total = sum(weights)
+            weights = self._projections[dimension] = [w/total for w in weights]
+        return weights
+
+
+    def _key(self, direction):
+        projection = sum(w*x for w, x in zip(self._weights(len(direction)), direction))
+        return len(direction), int(math.floor(projection/self.tolerance))
+
+
+    def _matches(self, a, b):
+        return len(a) == len(b) and max(abs(x-y) for x, y in zip(a, b)) <= self.tolerance
+
+
+    def _find(self, direction):
+        # The representative matching direction, and whether it matched
+        # the flipped direction, or (None, False).
+        candidates = [(direction, False)]
+        if self._ambiguous(direction):
+            candidates.append((tuple(-x for x in direction), True))
+        for d, flipped in candidates:
+            dimension, key = self._key(d)
+            for k in (key - 1, key, key + 1):
+                for representative in self._buckets.get((dimension, k), ()):
+                    if self._matches(d, self._directions[representative]):
+                        return representative, flipped
+        return None, False
+
+
+    def add(self, h):
+        direction, offset = self._canonical(h)
+        index = len(self.hyperplanes)
+
+        if direction is None:
+            self.hyperplanes.append(h)
+            self._directions.append(None)
+            self._offsets.append(None)
+            self._classes.append([index])
+            self._class_of.append(len(self._classes) - 1)
+            return index
+
+        representative, flipped = self._find(direction)
+        if flipped:
+            # Keep the class's sign, so its offsets stay comparable.
+            direction = tuple(-x for x in direction)
+            offset = -offset
+        self.hyperplanes.append(h)
+        self._directions.append(direction)
+        self._offsets.append(offset)
+
+        if representative is None:
+            found = len(self._classes)
+            self._classes.append([])
+            self._buckets.setdefault(self._key(direction), []).append(index)
+        else:
+            found = self._class_of[representative]
+        self._classes[found].append(index)
+        self._class_of.append(found)
+        return index
+
+
+    def parallel_classes(self):
+        return [[self.hyperplanes[i] for i in c] for c in self._classes]
+
+
+    def parallel_to(self, h):
+        direction, offset = self._canonical(h)
+        if direction is None:
+            return []
+        representative, _ = self._find(direction)
+        if representative is None:
+            return []
+        return [self.hyperplanes[i] for i in self._classes[self._class_of[representative]]]
+
+
+    def coincident_classes(self):
+        # Within a parallel class, hyperplanes coincide when their signed
+        # offsets agree; sorting the offsets keeps this near linear.
+        result = []
+        for c in self._classes:
+            members = sorted(c, key=lambda i: self._offsets[i] if self._offsets[i] is not None else 0)
+            group = [members[0]]
+            for i in members[1:]:
+                a = self._offsets[group[-1]]
+                b = self._offsets[i]
+                if a is not None and abs(a-b) <= self.tolerance*max(1, abs(a), abs(b)):
+                    group.append(i)
+                else:
+                    result.append([self.hyperplanes[k] for k in group])
+                    group = [i]
+            result.append([self.hyperplanes[k] for k in group])
+        return result
+
+
+    def intersecting_pairs(self):
+        # Hyperplanes from different parallel classes always meet; pairs
+        # are generated lazily so callers can stop early.
+        for a in range(len(self._classes)):
+            if self._directions[self._classes[a][0]] is None:
+                continue
+            for b in range(a+1, len(self._classes)):
+                if self._directions[self._classes[b][0]] is None:
+                    continue
+                for i in self._classes[a]:
+                    for j in self._classes[b]:
+                        yield self.hyperplanes[i], self.hyperplanes[j]
+
+
+    def __len__(self):
+        return len(self.hyperplanes)
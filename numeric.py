@@ -0,0 +1,133 @@
+from decimal import Decimal
+from fractions import Fraction
+from math import gcd
+import numbers
+
+
+EPSILON = 1e-10
+
+NOT_A_REAL_NUMBER_MSG = 'Cannot read {} as an exact number'
+
+
+def to_fraction(x):
+    # Floats (and Decimals that merely hold a float) are read as the
+    # decimal literal they print as, so 5.862 becomes 5862/1000 rather
+    # than its 53-bit binary expansion.
+    if isinstance(x, Fraction):
+        return x
+    if isinstance(x, int):
+        return Fraction(x)
+    if isinstance(x, float):
+        # float() first: NumPy 2 scalars repr as 'np.float64(...)'.
+        return Fraction(repr(float(x)))
+    if isinstance(x, Decimal) and x == float(x):
+        return Fraction(repr(float(x)))
+    if isinstance(x, (Decimal, numbers.Rational, str)):
+        return Fraction(x)
+    if isinstance(x, numbers.Real):
+        # Other real scalars (np.float32, np.float16, ...) are widened to
+        # a float first and read the same way. Their own short repr would
+        # not round-trip through the wider type.
+        return Fraction(repr(float(x)))
+    raise TypeError(NOT_A_REAL_NUMBER_MSG.format(type(x).__name__))
+
+
+def augmented_rows(planes, convert):
+    return [[convert(x) for x in p.normal_vector.coordinates] + [convert(p.constant_term)] for p in planes]
+
+
+def float_echelon(rows, reduced=True, eps=EPSILON):
+    m = len(rows)
+    n = len(rows[0]) - 1
+    r = 0
+    pivots = []
+    for c in range(n):
+        if r == m:
+            break
+        p = max(range(r, m), key=lambda i: abs(rows[i][c]))
+        if abs(rows[p][c]) < eps:
+            continue
+        rows[r], rows[p] = rows[p], rows[r]
+
+        pivot_row = rows[r]
+        if reduced:
+            pivot = pivot_row[c]
+            pivot_row[:] = [x/pivot for x in pivot_row]
+            targets = [i for i in range(m) if i != r]
+        else:
+            targets = range(r+1, m)
+
+        for i in targets:
+            row = rows[i]
+            factor = row[c]/pivot_row[c]
+            if factor:
+                row[:] = [x - factor*y for x, y in zip(row, pivot_row)]
+                row[c] = 0.0
+        pivots.append(c)
+        r += 1
+
+    for row in rows:
+        for j in range(n):
+            if abs(row[j]) < eps:
+                row[j] = 0.0
+    return rows, pivots
+
+
+def bareiss_echelon(rows):
+    # Fraction-free elimination: each row is first scaled to integers,
+    # then every update is an exact integer division by the previous
+    # pivot, which keeps entries bounded by minors of the input.
+    integer_rows = []
+    for row in rows:
+        denominator = 1
+        for x in row:
+            denominator = denominator*x.denominator//gcd(denominator, x.denominator)
+        integer_rows.append([int(x*denominator) for x in row])
+    M = integer_rows
+
+    m = len(M)
+    n = len(M[0]) - 1
+    r = 0
+    previous = 1
+    pivots = []
+    for c in range(n):
+        if r == m:
+            break
+        p = next((i for i in range(r, m) if M[i][c] != 0), None)
+        if p is None:
+            continue
+        M[r], M[p] = M[p], M[r]
+
+        pivot_row = M[r]
+        pivot = pivot_row[c]
+        for i in range(r+1, m):
+            row = M[i]
+            a = row[c]
+            for j in range(c+1, n+1):
+                row[j] = (pivot*row[j] - a*pivot_row[j])//previous
+            row[c] = 0
+        previous = pivot
+        pivots.append(c)
+        r += 1
+
+    return M, pivots
+
+
+def bareiss_rref(rows):
+    M, pivots = bareiss_echelon(rows)
+    n = len(M[0]) - 1
+    R = [[Fraction(x) for x in row] for row in M]
+
+    for r in range(len(pivots)-1, -1, -1):
+        c = pivots[r]
+        pivot_row = R[r]
+        pivot = pivot_row[c]
+        pivot_row[:] = [x/pivot for x in pivot_row]
+        for i in range(r):
+            row = R[i]
+            factor = row[c]
+            if factor:
+                for j in range(c, n+1):
+                    row[j] -= factor*pivot_row[j]
+
+    return R, pivots
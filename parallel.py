@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import dense
+
+
+EPSILON = 1e-10
+
+# Trailing updates smaller than this many entries are not worth a round
+# trip to the pool and run in the calling process instead.
+MIN_PARALLEL_ENTRIES = 1 << 14
+
+_attached = {}
+
+
+def _attach(name, shape):
+    entry = _attached.get(name)
+    if entry is None:
+        for shm, _ in _attached.values():
+            shm.close()
+        _attached.clear()
+        shm = shared_memory.SharedMemory(name=name)
+        entry = _attached[name] = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+    return entry[1]
+
+
+def _update_rows(M, pivot_row, column, start, stop):
+    pivot = M[pivot_row]
+    factors = M[start:stop, column] / pivot[column]
+    if start <= pivot_row < stop:
+        factors[pivot_row - start] = 0
+    M[start:stop, column:] -= factors[:, np.newaxis] * pivot[column:]
+    M[start:stop, column][factors != 0] = 0
+
+
+def _update_block(name, shape, pivot_row, column, start, stop):
+    _update_rows(_attach(name, shape), pivot_row, column, start, stop)
+
+
+def eliminate(augmented, reduced=True, workers=None, eps=EPSILON):
+    # Row-blocked partial-pivot elimination of one (m x n+1) augmented
+    # matrix. The matrix lives in a shared memory segment; at each step
+    # the calling process picks and scales the pivot row, then the
+    # trailing update (every other row for the RREF, only the rows below
+    # for triangular form) is split into one block of rows per worker.
+    A = np.asarray(augmented, dtype=np.float64)
+    m, cols = A.shape
+    n = cols - 1
+    workers = workers or os.cpu_count() or 1
+
+    shm = shared_memory.SharedMemory(create=True, size=max(A.nbytes, 1))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    M = np.ndarray(A.shape, dtype=np.float64, buffer=shm.buf)
+    try:
+        M[:] = A
+        _eliminate_shared(M, shm.name, pool, workers, reduced, eps)
+        result = M.copy()
+    finally:
+        del M
+        if pool is not None:
+            pool.shutdown()
+        try:
+            shm.close()
+        except BufferError:
+            # A traceback still holds a view; the unlink below frees the
+            # segment once that goes away.
+            pass
+        shm.unlink()
+
+    coefficients = result[:, :n]
+    coefficients[np.abs(coefficients) < eps] = 0
+    return result
+
+
+def _eliminate_shared(M, name, pool, workers, reduced, eps):
+    m, cols = M.shape
+    r = 0
+    for c in range(cols - 1):
+        if r == m:
+            break
+        p = r + int(np.argmax(np.abs(M[r:, c])))
+        if abs(M[p, c]) <= eps:
+            continue
+        if p != r:
+            M[[r, p]] = M[[p, r]]
+
+        if reduced:
+            M[r, c:] /= M[r, c]
+            first = 0
+        else:
+            first = r + 1
+
+        if first < m:
+            if pool is None or (m - first)*(cols - c) < MIN_PARALLEL_ENTRIES:
+                _update_rows(M, r, c, first, m)
+            else:
+                bounds = np.linspace(first, m, workers + 1).astype(int)
+                futures = [pool.submit(_update_block, name, M.shape, r, c, start, stop)
+                           for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+                wait(futures)
+                for f in futures:
+                    f.result()
+        r += 1
+
+
+def compute_triangular_form(system, workers=None):
+    M = eliminate(dense.planes_to_matrix(system.planes), reduced=False, workers=workers)
+    return dense.matrix_to_planes(M)
+
+
+def compute_rref(system, workers=None):
+    M = eliminate(dense.planes_to_matrix(system.planes), reduced=True, workers=workers)
+    return dense.matrix_to_planes(M)
@@ -0,0 +1,26 @@
+class Parametrization(object):
+
+    BASEPT_AND_DIR_VECTORS_MUST_BE_IN_SAME_DIM_MSG = 'The basepoint and direction vectors should all live in the same dimension'
+
+    def __init__(self, basepoint, direction_vectors):
+        try:
+            self.basepoint = basepoint
+            self.direction_vectors = direction_vectors
+            self.dimension = self.basepoint.dimension
+
+            for v in direction_vectors:
+                assert v.dimension == self.dimension
+
+        except AssertionError:
+            raise Exception(self.BASEPT_AND_DIR_VECTORS_MUST_BE_IN_SAME_DIM_MSG)
+
+
+    def __str__(self):
+
+        output = ''
+        for coord in range(self.dimension):
+            terms = ['{}'.format(round(float(self.basepoint.coordinates[coord]), 3))]
+            for free_var, vector in enumerate(self.direction_vectors):
+                terms.append('{} t_{}'.format(round(float(vector.coordinates[coord]), 3), free_var + 1))
+            output += 'x_{} = {}\n'.format(coord + 1, ' + '.join(terms))
+        return output
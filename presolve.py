@@ -0,0 +1,234 @@
+from vector import Vector
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+from parametrization import Parametrization
+from sparse import SparseEquation
+import numeric
+from normal_index import canonical_scale
+
+
+class Presolve(object):
+
+    NO_SOLUTIONS_MSG = LinearSystem.NO_SOLUTIONS_MSG
+
+    # What happened to each original equation, in row_actions.
+    KEPT = 'kept'
+    EMPTY = 'empty'
+    DUPLICATE = 'duplicate'
+    SINGLETON = 'singleton'
+    INCONSISTENT = 'inconsistent'
+
+    def __init__(self, system, eps=numeric.EPSILON, tolerance=1e-9):
+        self.dimension = system.dimension
+        self.eps = eps
+        self.tolerance = tolerance
+        self.status = None
+        # Per original equation: (action, detail) where detail is the
+        # reduced row index for KEPT, the representative equation for
+        # DUPLICATE, the fixed column for SINGLETON and None otherwise.
+        self.row_actions = [None]*len(system)
+        # Column -> value of every variable fixed by a singleton row.
+        self.fixed = {}
+        self.kept_rows = []
+        self.kept_columns = []
+        self.free_columns = []
+        self.system = None
+        self._sparse = system.is_sparse()
+        self._numeric = system.numeric
+
+        rows, constants = self._rows(system)
+        if self._substitute_singletons(rows, constants) and self._collapse_duplicates(rows, constants):
+            self._build_reduced(rows, constants)
+
+
+    def _rows(self, system):
+        rows = []
+        constants = []
+        for p in system.planes:
+            if self._sparse:
+                items = p.coefficients.items()
+            else:
+                items = enumerate(p.normal_vector.coordinates)
+            rows.append({c: float(a) for c, a in items if abs(a) > self.eps})
+            constants.append(float(p.constant_term))
+        return rows, constants
+
+
+    def _substitute_singletons(self, rows, constants):
+        # Empty rows are dropped (or prove the system inconsistent) and a
+        # row with one nonzero fixes its variable, which is then
+        # substituted out of every other row. Substitution only removes
+        # entries, so it can expose new empty and singleton rows but never
+        # fills anything in.
+        column_rows = {}
+        for r, row in enumerate(rows):
+            for c in row:
+                column_rows.setdefault(c, set()).add(r)
+
+        queue = list(range(len(rows)-1, -1, -1))
+        while queue:
+            r = queue.pop()
+            if self.row_actions[r] is not None:
+                continue
+            row = rows[r]
+            if not row:
+                if abs(constants[r]) > self.eps:
+                    self.row_actions[r] = (self.INCONSISTENT, None)
+                    self.status = self.NO_SOLUTIONS_MSG
+                    return False
+                self.row_actions[r] = (self.EMPTY, None)
+            elif len(row) == 1:
+                (c, a), = row.items()
+                value = constants[r]/a
+                self.fixed[c] = value
+                self.row_actions[r] = (self.SINGLETON, c)
+                for i in column_rows.pop(c):
+                    if i == r:
+                        continue
+                    constants[i] -= rows[i].pop(c)*value
+                    queue.append(i)
+        return True
+
+
+    def _canonical(self, row, constant):
+        # Unit normal with its largest coordinate made positive, as in
+        # NormalIndex, so scaled copies of an equation share a key.
+        scale = canonical_scale(list(row.values()))
+        direction = tuple(sorted((c, a*scale) for c, a in row.items()))
+        return direction, constant*scale
+
+
+    def _key(self, direction):
+        return tuple((c, round(a/self.tolerance)) for c, a in direction)
+
+
+    def _ambiguous(self, direction):
+        magnitudes = sorted((abs(a) for _, a in direction), reverse=True)
+        return len(magnitudes) > 1 and magnitudes[0] - magnitudes[1] <= 2*self.tolerance
+
+
+    def _collapse_duplicates(self, rows, constants):
+        representatives = {}
+        for r, row in enumerate(rows):
+            if self.row_actions[r] is not None:
+                continue
+            direction, offset = self._canonical(row, constants[r])
+            key = self._key(direction)
+            found = representatives.get(key)
+            if found is None and self._ambiguous(direction):
+                # The two largest coefficients are about equal in size, so
+                # a duplicate may have been flipped the other way.
+                flipped = tuple((c, -a) for c, a in direction)
+                found = representatives.get(self._key(flipped))
+                if found is not None:
+                    direction, offset = flipped, -offset
+            if found is None:
+                representatives[key] = (r, direction, offset)
+                continue
+            representative, other_direction, other_offset = found
+            if any(abs(a - b) > self.tolerance for (_, a), (_, b) in zip(direction, other_direction)):
+                continue
+            if abs(offset - other_offset) > self.tolerance:
+                self.row_actions[r] = (self.INCONSISTENT, representative)
+                self.status = self.NO_SOLUTIONS_MSG
+                return False
+            self.row_actions[r] = (self.DUPLICATE, representative)
+        return True
+
+
+    def _build_reduced(self, rows, constants):
+        self.kept_rows = [r for r, action in enumerate(self.row_actions) if action is None]
+        used = set()
+        for r in self.kept_rows:
+            used.update(rows[r])
+        self.kept_columns = sorted(used)
+        self.free_columns = [c for c in range(self.dimension) if c not in used and c not in self.fixed]
+
+        position = {c: k for k, c in enumerate(self.kept_columns)}
+        n = len(self.kept_columns)
+        planes = []
+        for k, r in enumerate(self.kept_rows):
+            self.row_actions[r] = (self.KEPT, k)
+            coefficients = {position[c]: a for c, a in rows[r].items()}
+            if self._sparse:
+                planes.append(SparseEquation(n, coefficients, constants[r]))
+            else:
+                coordinates = [0.0]*n
+                for c, a in coefficients.items():
+                    coordinates[c] = a
+                planes.append(Hyperplane.build(normal_vector=Vector(coordinates), constant_term=constants[r]))
+        if planes:
+            self.system = LinearSystem(planes, self._numeric)
+
+
+    @property
+    def removed_rows(self):
+        return len(self.row_actions) - len(self.kept_rows)
+
+
+    @property
+    def removed_columns(self):
+        return self.dimension - len(self.kept_columns)
+
+
+    def counts(self):
+        out = {}
+        for action in self.row_actions:
+            if action is not None:
+                out[action[0]] = out.get(action[0], 0) + 1
+        return out
+
+
+    def postsolve(self, reduced):
+        # Lifts a solution of the reduced system (a Vector, Parametrization
+        # or NO_SOLUTIONS_MSG; None when nothing was left to solve) back to
+        # the variables of the original system.
+        if self.status is not None:
+            return self.status
+        if isinstance(reduced, str):
+            return reduced
+
+        if isinstance(reduced, Parametrization):
+            basepoint = reduced.basepoint.coordinates
+            directions = [v.coordinates for v in reduced.direction_vectors]
+        elif reduced is not None:
+            basepoint = reduced.coordinates
+            directions = []
+        else:
+            basepoint = ()
+            directions = []
+
+        point = [0]*self.dimension
+        for c, value in self.fixed.items():
+            point[c] = value
+        for c, value in zip(self.kept_columns, basepoint):
+            point[c] = value
+
+        direction_vectors = []
+        for d in directions:
+            lifted = [0]*self.dimension
+            for c, value in zip(self.kept_columns, d):
+                lifted[c] = value
+            direction_vectors.append(Vector(lifted))
+        for c in self.free_columns:
+            unit = [0]*self.dimension
+            unit[c] = 1
+            direction_vectors.append(Vector(unit))
+
+        if not direction_vectors:
+            return Vector(point)
+        return Parametrization(Vector(point), direction_vectors)
+
+
+    def solve(self):
+        if self.status is not None:
+            return self.status
+        reduced = self.system.solve() if self.system is not None else None
+        return self.postsolve(reduced)
+
+
+    def __str__(self):
+        if self.status is not None:
+            return 'Presolve: {}'.format(self.status)
+        return 'Presolve: removed {} of {} rows and {} of {} columns {}'.format(
+            self.removed_rows, len(self.row_actions), self.removed_columns, self.dimension, self.counts())
@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+import dense
+import intersection
+
+
+# A local service for many small solve and intersect calls. Requests
+# arrive over a Unix socket or TCP as length-prefixed JSON frames (a
+# 4-byte big-endian length, then a UTF-8 JSON object):
+#
+#   {"id": 1, "op": "solve", "rows": [[a11, ..., a1n, k1], ...]}
+#   {"id": 2, "op": "intersect", "lines": [[a, b, k1], [c, d, k2]]}
+#   {"id": 3, "op": "stats"}
+#
+# Concurrent requests with the same shape are queued together and run as
+# one dense.parametrize_batch or intersection.intersect_lines call once
+# the queue holds max_batch requests or its oldest request has waited
+# max_delay seconds. Each response carries the id of its request, so a
+# client may pipeline and receive answers out of order.
+#
+#   python solve_server.py serve --unix /tmp/linear-algebra.sock
+#   python solve_server.py load --unix /tmp/linear-algebra.sock --requests 20000
+
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 1 << 24
+
+UNKNOWN_OPERATION_MSG = 'Unknown operation'
+MALFORMED_REQUEST_MSG = 'Malformed request'
+NON_NUMERIC_VALUE_MSG = 'Coefficients and constants must be finite numbers'
+FRAME_TOO_LARGE_MSG = 'Frame too large'
+
+LATENCY_WINDOW = 10000
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(FRAME_TOO_LARGE_MSG)
+    return json.loads(await reader.readexactly(size))
+
+
+def encode_frame(message):
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _finite(values):
+    # NaN and infinities are not JSON; they only occur for rows without
+    # a solution, which are reported through the status instead.
+    return [x if math.isfinite(x) else None for x in values]
+
+
+def _float_rows(rows, width):
+    # Every request is converted and checked on its own before it joins
+    # a batch, so bad input fails only the request that carried it.
+    if not isinstance(rows, list) or not rows:
+        raise Exception(MALFORMED_REQUEST_MSG)
+    out = []
+    for row in rows:
+        if not isinstance(row, list) or len(row) != (width or len(rows[0])):
+            raise Exception(MALFORMED_REQUEST_MSG)
+        values = []
+        for x in row:
+            if isinstance(x, bool) or not isinstance(x, (int, float)) or not math.isfinite(x):
+                raise Exception(NON_NUMERIC_VALUE_MSG)
+            values.append(float(x))
+        out.append(values)
+    return out
+
+
+class Counters(object):
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.responses = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.waiting_for_capacity = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+        self.largest_batch = max(self.largest_batch, size)
+
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        def percentile(q):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(q*len(latencies)))]
+        elapsed = time.perf_counter() - self.started
+        return {
+            'uptime_seconds': elapsed,
+            'requests': self.requests,
+            'responses': self.responses,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests/float(self.batches) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'waiting_for_capacity': self.waiting_for_capacity,
+            'throughput_per_second': self.responses/elapsed if elapsed else 0.0,
+            'latency_p50_seconds': percentile(0.5),
+            'latency_p99_seconds': percentile(0.99),
+            'latency_max_seconds': latencies[-1] if latencies else None,
+        }
+
+
+class _Queue(object):
+
+    def __init__(self):
+        self.items = []
+        self.timer = None
+
+
+class SolveServer(object):
+
+    def __init__(self, max_batch=256, max_delay=0.002, max_pending=4096, eps=dense.EPSILON):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.eps = eps
+        self.counters = Counters()
+        self._queues = {}
+        # Back-pressure: a connection stops reading new frames while
+        # max_pending requests are queued or being answered, which leaves
+        # the rest in the socket buffers and eventually blocks the sender.
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._server = None
+
+
+    async def start_unix(self, path):
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        return self._server
+
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                if self._capacity.locked():
+                    self.counters.waiting_for_capacity += 1
+                await self._capacity.acquire()
+                try:
+                    message = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    self._capacity.release()
+                    break
+                except ValueError as e:
+                    self._capacity.release()
+                    writer.write(encode_frame({'id': None, 'error': str(e)}))
+                    break
+                task = asyncio.ensure_future(self._answer(message, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+    async def _answer(self, message, writer):
+        started = time.perf_counter()
+        self.counters.requests += 1
+        try:
+            response = await self._dispatch(message)
+        except Exception as e:
+            self.counters.errors += 1
+            response = {'error': str(e)}
+        finally:
+            self._capacity.release()
+        response['id'] = message.get('id') if isinstance(message, dict) else None
+        self.counters.responses += 1
+        self.counters.latencies.append(time.perf_counter() - started)
+        writer.write(encode_frame(response))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+    def _dispatch(self, message):
+        if not isinstance(message, dict):
+            raise Exception(MALFORMED_REQUEST_MSG)
+        op = message.get('op')
+        if op == 'solve':
+            rows = _float_rows(message.get('rows'), None)
+            if len(rows[0]) < 2:
+                raise Exception(MALFORMED_REQUEST_MSG)
+            return self._enqueue(('solve', len(rows), len(rows[0])), rows)
+        if op == 'intersect':
+            lines = _float_rows(message.get('lines'), 3)
+            if len(lines) != 2:
+                raise Exception(MALFORMED_REQUEST_MSG)
+            return self._enqueue(('intersect',), lines)
+        if op == 'stats':
+            return self._immediate(self.counters.snapshot())
+        raise Exception(UNKNOWN_OPERATION_MSG)
+
+
+    async def _immediate(self, stats):
+        return {'stats': stats}
+
+
+    def _enqueue(self, key, payload):
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _Queue()
+        queue.items.append((payload, future))
+        if len(queue.items) >= self.max_batch:
+            self._flush(key)
+        elif queue.timer is None:
+            queue.timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush, key)
+        return future
+
+
+    def _flush(self, key):
+        queue = self._queues.pop(key, None)
+        if queue is None:
+            return
+        if queue.timer is not None:
+            queue.timer.cancel()
+        payloads = [p for p, _ in queue.items]
+        futures = [f for _, f in queue.items]
+        self.counters.record_batch(len(payloads))
+        try:
+            if key[0] == 'solve':
+                responses = self._solve_batch(payloads)
+            else:
+                responses = self._intersect_batch(payloads)
+        except Exception as e:
+            responses = [{'error': str(e)}]*len(futures)
+            self.counters.errors += len(futures)
+        for future, response in zip(futures, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+    def _solve_batch(self, payloads):
+        augmented = np.array(payloads, dtype=np.float64)
+        status, basepoints, directions, free = dense.parametrize_batch(augmented, self.eps)
+        responses = []
+        for k, s in enumerate(status):
+            response = {'status': dense.STATUS_MESSAGES[s]}
+            if s == dense.UNIQUE_SOLUTION:
+                response['solution'] = basepoints[k].tolist()
+            elif s == dense.INF_SOLUTIONS:
+                response['basepoint'] = basepoints[k].tolist()
+                response['directions'] = directions[k][free[k]].tolist()
+            responses.append(response)
+        return responses
+
+
+    def _intersect_batch(self, payloads):
+        lines = np.array(payloads, dtype=np.float64)
+        points, status = intersection.intersect_lines(lines[:, 0, :2], lines[:, 0, 2], lines[:, 1, :2], lines[:, 1, 2])
+        responses = []
+        for k, s in enumerate(status):
+            response = {'status': intersection.STATUS_MESSAGES[s]}
+            if s == intersection.UNIQUE:
+                response['point'] = _finite(points[k].tolist())
+            responses.append(response)
+        return responses
+
+
+class SolveClient(object):
+
+    # Pipelining client: any number of coroutines may await requests on
+    # one connection at the same time.
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._listener = asyncio.ensure_future(self._listen())
+
+
+    @classmethod
+    async def connect_unix(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+
+    @classmethod
+    async def connect_tcp(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+
+    async def _listen(self):
+        try:
+            while True:
+                message = await read_frame(self._reader)
+                future = self._waiting.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(str(e)))
+            self._waiting.clear()
+
+
+    async def request(self, message):
+        self._next_id += 1
+        message = dict(message, id=self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self._writer.write(encode_frame(message))
+        await self._writer.drain()
+        return await future
+
+
+    def solve(self, rows):
+        return self.request({'op': 'solve', 'rows': rows})
+
+
+    def intersect(self, line1, line2):
+        return self.request({'op': 'intersect', 'lines': [line1, line2]})
+
+
+    def stats(self):
+        return self.request({'op': 'stats'})
+
+
+    async def close(self):
+        self._listener.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _connect(unix=None, host='127.0.0.1', port=None):
+    if unix:
+        return await SolveClient.connect_unix(unix)
+    return await SolveClient.connect_tcp(host, port)
+
+
+async def load_test(unix=None, host='127.0.0.1', port=None, requests=10000, concurrency=256,
+                    connections=4, op='solve', size=3, seed=0):
+    # Fires requests from `concurrency` coroutines spread over a few
+    # connections and reports client-side throughput and latency.
+    rng = random.Random(seed)
+    if op == 'solve':
+        messages = [{'op': 'solve', 'rows': [[rng.uniform(-10, 10) for _ in range(size + 1)] for _ in range(size)]}
+                    for _ in range(min(requests, 1024))]
+    else:
+        messages = [{'op': 'intersect', 'lines': [[rng.uniform(-10, 10) for _ in range(3)] for _ in range(2)]}
+                    for _ in range(min(requests, 1024))]
+
+    clients = [await _connect(unix, host, port) for _ in range(connections)]
+    latencies = []
+    errors = [0]
+    counter = iter(range(requests))
+
+    async def worker(client):
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.request(messages[i % len(messages)])
+            latencies.append(time.perf_counter() - started)
+            if 'error' in response:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(clients[k % connections]) for k in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    server_stats = (await clients[0].stats())['stats']
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors[0],
+        'seconds': elapsed,
+        'throughput_per_second': requests/elapsed,
+        'latency_p50_seconds': latencies[len(latencies)//2],
+        'latency_p99_seconds': latencies[min(len(latencies) - 1, int(0.99*len(latencies)))],
+        'server': server_stats,
+    }
+
+
+async def _serve(args):
+    server = SolveServer(args.max_batch, args.max_delay, args.max_pending)
+    if args.unix:
+        s = await server.start_unix(args.unix)
+    else:
+        s = await server.start_tcp(args.host, args.port)
+    print('listening on {}'.format(', '.join(str(sock.getsockname()) for sock in s.sockets)))
+    async with s:
+        await s.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-batching solve/intersect server.')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--unix', help='Unix socket path (default: TCP)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-delay', type=float, default=0.002, help='seconds a request may wait for its batch')
+    parser.add_argument('--max-pending', type=int, default=4096)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--op', choices=('solve', 'intersect'), default='solve')
+    parser.add_argument('--size', type=int, default=3, help='unknowns per system for solve load')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'serve':
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = asyncio.run(load_test(args.unix, args.host, args.port, args.requests, args.concurrency,
+                                   args.connections, args.op, args.size))
+    print(json.dumps(result, indent=1))
+    return 0
+
+
+if __name__ == '__main__':
+    main()
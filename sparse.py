@@ -0,0 +1,306 @@
+import heapq
+from decimal import Decimal, localcontext
+
+from vector import Vector
+from hyperplane import DECIMAL_CONTEXT
+
+
+class SparseEquation(object):
+
+    NO_NONZERO_ELTS_FOUND_MSG = 'No nonzero elements found'
+    INDEX_OUT_OF_RANGE_MSG = 'Coefficient index outside the dimension of the equation'
+
+    def __init__(self, dimension, coefficients=None, constant_term=None):
+        self.dimension = dimension
+
+        if not coefficients:
+            coefficients = {}
+        self.coefficients = {}
+        for i, c in coefficients.items():
+            if not 0 <= i < dimension:
+                raise Exception(self.INDEX_OUT_OF_RANGE_MSG)
+            if c != 0:
+                self.coefficients[i] = float(c)
+
+        if not constant_term:
+            constant_term = Decimal(0)
+        self.constant_term = Decimal(constant_term)
+
+
+    @classmethod
+    def from_plane(cls, p):
+        coefficients = {i: c for i, c in enumerate(p.normal_vector.coordinates) if c != 0}
+        return cls(p.dimension, coefficients, p.constant_term)
+
+
+    @property
+    def normal_vector(self):
+        coordinates = [0]*self.dimension
+        for i, c in self.coefficients.items():
+            coordinates[i] = c
+        return Vector(coordinates)
+
+
+    def first_nonzero_index(self, eps=1e-10):
+        indices = [i for i, c in self.coefficients.items() if abs(c) >= eps]
+        if not indices:
+            raise Exception(SparseEquation.NO_NONZERO_ELTS_FOUND_MSG)
+        return min(indices)
+
+
+    def __eq__(self, e):
+        return (self.dimension == e.dimension and self.constant_term == e.constant_term
+                and self.coefficients == e.coefficients)
+
+
+    def __str__(self):
+        with localcontext(DECIMAL_CONTEXT):
+            return self._format()
+
+
+    def _format(self):
+
+        num_decimal_places = 3
+
+        def write_coefficient(coefficient, is_initial_term=False):
+            coefficient = round(coefficient, num_decimal_places)
+            if coefficient % 1 == 0:
+                coefficient = int(coefficient)
+
+            output = ''
+
+            if coefficient < 0:
+                output += '-'
+            if coefficient > 0 and not is_initial_term:
+                output += '+'
+
+            if not is_initial_term:
+                output += ' '
+
+            if abs(coefficient) != 1:
+                output += '{}'.format(abs(coefficient))
+
+            return output
+
+        indices = [i for i in sorted(self.coefficients) if round(self.coefficients[i], num_decimal_places) != 0]
+        if indices:
+            terms = [write_coefficient(self.coefficients[i], is_initial_term=(k==0)) + 'x_{}'.format(i+1)
+                     for k, i in enumerate(indices)]
+            output = ' '.join(terms)
+        else:
+            output = '0'
+
+        constant = round(self.constant_term, num_decimal_places)
+        if constant % 1 == 0:
+            constant = int(constant)
+        output += ' = {}'.format(constant)
+
+        return output
+
+
+def _forward_eliminate(equations, eps, threshold):
+    # Markowitz-ordered elimination: repeatedly pivot on the active column
+    # with the fewest nonzeros, choosing among its numerically acceptable
+    # entries (|a| >= threshold * column max) the row with the fewest
+    # nonzeros. Only stored entries are ever visited.
+    rows = [dict(e.coefficients) for e in equations]
+    constants = [float(e.constant_term) for e in equations]
+
+    columns = {}
+    for r, row in enumerate(rows):
+        for c in row:
+            columns.setdefault(c, set()).add(r)
+
+    heap = [(len(rs), c) for c, rs in columns.items()]
+    heapq.heapify(heap)
+    pivots = []
+
+    while heap:
+        count, c = heapq.heappop(heap)
+        candidates = columns.get(c)
+        if candidates is None or count != len(candidates):
+            continue
+        if not candidates:
+            del columns[c]
+            continue
+
+        largest = max(abs(rows[r][c]) for r in candidates)
+        if largest < eps:
+            for r in candidates:
+                del rows[r][c]
+            del columns[c]
+            continue
+        r = min((r for r in candidates if abs(rows[r][c]) >= threshold*largest),
+                key=lambda r: (len(rows[r]), r))
+
+        pivot_row = rows[r]
+        pivot = pivot_row[c]
+        for k in pivot_row:
+            columns[k].discard(r)
+        del columns[c]
+
+        changed = set()
+        for i in candidates:
+            row = rows[i]
+            factor = row.pop(c)/pivot
+            for k, v in pivot_row.items():
+                if k == c:
+                    continue
+                value = row.get(k, 0.0) - factor*v
+                if abs(value) < eps:
+                    if k in row:
+                        del row[k]
+                        columns[k].discard(i)
+                else:
+                    if k not in row:
+                        columns[k].add(i)
+                    row[k] = value
+            constants[i] -= factor*constants[r]
+
+        for k in pivot_row:
+            if k in columns:
+                changed.add(k)
+        for k in changed:
+            heapq.heappush(heap, (len(columns[k]), k))
+
+        pivots.append((r, c))
+
+    return rows, constants, pivots
+
+
+def _to_equations(dimension, rows, constants, order):
+    return [SparseEquation(dimension, rows[r], constants[r]) for r in order]
+
+
+def _exchange_free_columns(rows, constants, pivots, eps, threshold):
+    # Turns an RREF on the Markowitz pivots into the RREF in the original
+    # variable order. Free columns are visited left to right; one that a
+    # row pivoted further right still holds is independent of everything
+    # to its left, so it becomes that row's pivot and the old pivot column
+    # turns free, to be visited in its turn. Each exchange is a single
+    # Gauss-Jordan step, and only rows holding the entering column change.
+    pivot_of = dict(pivots)
+    columns = {}
+    for r, c in pivots:
+        for k in rows[r]:
+            if k != c:
+                columns.setdefault(k, set()).add(r)
+
+    heap = list(columns)
+    heapq.heapify(heap)
+    while heap:
+        f = heapq.heappop(heap)
+        holders = columns.get(f)
+        if not holders:
+            continue
+        candidates = [r for r in holders if pivot_of[r] > f]
+        if not candidates:
+            continue
+        largest = max(abs(rows[r][f]) for r in candidates)
+        if largest < eps:
+            for r in candidates:
+                del rows[r][f]
+                holders.discard(r)
+            continue
+        # Among acceptable entries, release the rightmost pivot.
+        r = max((r for r in candidates if abs(rows[r][f]) >= threshold*largest), key=lambda r: pivot_of[r])
+
+        pivot_row = rows[r]
+        pivot = pivot_row[f]
+        for k in pivot_row:
+            pivot_row[k] /= pivot
+        constants[r] /= pivot
+        pivot_row[f] = 1.0
+        c = pivot_of[r]
+        pivot_of[r] = f
+        holders.discard(r)
+        columns.setdefault(c, set()).add(r)
+
+        for i in holders:
+            row = rows[i]
+            factor = row.pop(f)
+            for k, v in pivot_row.items():
+                if k == f:
+                    continue
+                value = row.get(k, 0.0) - factor*v
+                if abs(value) < eps:
+                    if k in row:
+                        del row[k]
+                        columns[k].discard(i)
+                else:
+                    if k not in row:
+                        columns.setdefault(k, set()).add(i)
+                    row[k] = value
+            constants[i] -= factor*constants[r]
+        del columns[f]
+        heapq.heappush(heap, c)
+
+    return list(pivot_of.items())
+
+
+def reduce_rows(system, eps=1e-10, threshold=0.1, variable_order=True):
+    # The RREF as (rows, constants, pivots): one {column: coefficient}
+    # dict and one float per equation, and a (row, column) pair per pivot.
+    # Rows that are not listed as pivots are empty. Without variable_order
+    # the pivots stay the Markowitz ones: still reduced, and enough to
+    # read a solution from, but not necessarily the leftmost columns.
+    rows, constants, pivots = _forward_eliminate(system.planes, eps, threshold)
+
+    # Back substitution in reverse pivot order. By the time pivot k is
+    # used, its row only holds its own pivot column and free columns, so
+    # the rows above it can only fill in free columns.
+    pivot_column_rows = {}
+    for r, c in pivots:
+        pivot_column_rows[c] = []
+    for r, c in pivots:
+        for k in rows[r]:
+            if k in pivot_column_rows and k != c:
+                pivot_column_rows[k].append(r)
+
+    for r, c in reversed(pivots):
+        pivot_row = rows[r]
+        pivot = pivot_row[c]
+        if pivot != 1:
+            for k in pivot_row:
+                pivot_row[k] /= pivot
+            constants[r] /= pivot
+            pivot_row[c] = 1.0
+
+        for i in pivot_column_rows[c]:
+            row = rows[i]
+            factor = row.pop(c, 0.0)
+            if not factor:
+                continue
+            for k, v in pivot_row.items():
+                if k == c:
+                    continue
+                value = row.get(k, 0.0) - factor*v
+                if abs(value) < eps:
+                    row.pop(k, None)
+                else:
+                    row[k] = value
+            constants[i] -= factor*constants[r]
+
+    # Only a rank-deficient system has free columns, and only those left
+    # of a pivot in its row need moving.
+    if variable_order and any(min(rows[r]) != c for r, c in pivots):
+        pivots = _exchange_free_columns(rows, constants, pivots, eps, threshold)
+    return rows, constants, pivots
+
+
+def compute_triangular_form(system, eps=1e-10, threshold=0.1):
+    # Markowitz pivots are triangular only up to a permutation of the
+    # columns, and an echelon form in the original variable order can
+    # fill in far more than the fill-reducing order does (a whole row
+    # and column for an arrowhead system). The RREF is an echelon form
+    # and comes out of the Markowitz order at little more than the cost
+    # of the forward pass, so it serves as the triangular form too.
+    return compute_rref(system, eps, threshold)
+
+
+def compute_rref(system, eps=1e-10, threshold=0.1):
+    rows, constants, pivots = reduce_rows(system, eps, threshold)
+    pivot_rows = [r for r, c in sorted(pivots, key=lambda p: p[1])]
+    used = set(pivot_rows)
+    order = pivot_rows + [r for r in range(len(rows)) if r not in used]
+    return _to_equations(system.dimension, rows, constants, order)
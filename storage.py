@@ -0,0 +1,222 @@
+import math
+import mmap
+import struct
+import sys
+from array import array
+
+from compact_vector import CompactVector
+from vector import Vector
+from hyperplane import Hyperplane
+from linsys import LinearSystem
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# File layout: a 64-byte header followed by a C-ordered, little-endian
+# float64 payload of rows x cols values. Vector collections store one
+# vector per row; linear systems store one equation per row as the
+# normal vector followed by the constant term.
+VECTORS_MAGIC = b'LAVECTRS'
+SYSTEM_MAGIC = b'LASYSTEM'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQ32x')
+HEADER_SIZE = HEADER.size
+
+NOT_A_VECTOR_FILE_MSG = 'Not a vector collection file'
+NOT_A_SYSTEM_FILE_MSG = 'Not a linear system file'
+UNSUPPORTED_VERSION_MSG = 'Unsupported file format version'
+ROWS_MUST_HAVE_SAME_LENGTH_MSG = 'All rows should have the same length'
+MAPPING_CLOSED_MSG = 'The mapping is closed'
+
+
+def _write(path, magic, rows):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(magic, VERSION, 0, 0, 0))
+        count = 0
+        width = None
+        for row in rows:
+            values = array('d', row)
+            if width is None:
+                width = len(values)
+            elif len(values) != width:
+                raise Exception(ROWS_MUST_HAVE_SAME_LENGTH_MSG)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            values.tofile(f)
+            count += 1
+        f.seek(0)
+        f.write(HEADER.pack(magic, VERSION, 0, count, width or 0))
+    return count
+
+
+def save_vectors(path, vectors):
+    return _write(path, VECTORS_MAGIC, (v.coordinates for v in vectors))
+
+
+def save_system(path, system):
+    rows = ([float(x) for x in p.normal_vector.coordinates] + [float(p.constant_term)] for p in system.planes)
+    return _write(path, SYSTEM_MAGIC, rows)
+
+
+class _MappedRows(object):
+
+    def __init__(self, path, magic, wrong_magic_msg):
+        self._file = open(path, 'rb')
+        try:
+            header = self._file.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE:
+                raise Exception(wrong_magic_msg)
+            found, version, _, rows, cols = HEADER.unpack(header)
+            if found != magic:
+                raise Exception(wrong_magic_msg)
+            if version != VERSION:
+                raise Exception(UNSUPPORTED_VERSION_MSG)
+            self.rows = rows
+            self.cols = cols
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if rows else None
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)[HEADER_SIZE:].cast('d') if rows else memoryview(array('d'))
+
+
+    def row(self, i):
+        if self._view is None:
+            raise ValueError(MAPPING_CLOSED_MSG)
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError('row index out of range')
+        return self._view[i*self.cols:(i+1)*self.cols]
+
+
+    def chunks(self, chunk_rows=65536):
+        # Yields (first_row, values) pairs; values is a zero-copy NumPy
+        # array of shape (rows, cols) when NumPy is available and a flat
+        # float64 memoryview otherwise.
+        if self._view is None:
+            raise ValueError(MAPPING_CLOSED_MSG)
+        data = self._view
+        for start in range(0, self.rows, chunk_rows):
+            stop = min(start + chunk_rows, self.rows)
+            view = data[start*self.cols:stop*self.cols]
+            if np is not None:
+                view = np.frombuffer(view, dtype='<f8').reshape(stop - start, self.cols)
+            yield start, view
+
+
+    def close(self):
+        # Rows and chunks handed out earlier may still view the mapping;
+        # they stay valid, and the mapping is only dropped here and
+        # unmapped once the last of them is collected.
+        if self._view is None:
+            return
+        view, self._view = self._view, None
+        mapping, self._map = self._map, None
+        try:
+            view.release()
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+    def __len__(self):
+        return self.rows
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MappedVectors(_MappedRows):
+
+    def __init__(self, path):
+        super(MappedVectors, self).__init__(path, VECTORS_MAGIC, NOT_A_VECTOR_FILE_MSG)
+        self.dimension = self.cols
+
+
+    def __getitem__(self, i):
+        return CompactVector(self.row(i))
+
+
+    def magnitudes(self, chunk_rows=65536):
+        out = []
+        for start, values in self.chunks(chunk_rows):
+            if np is not None:
+                out.append(np.sqrt(np.einsum('ij,ij->i', values, values)))
+            else:
+                d = self.cols
+                out.extend(math.sqrt(sum(x*x for x in values[k:k+d])) for k in range(0, len(values), d))
+        if np is not None:
+            return np.concatenate(out) if out else np.empty(0)
+        return out
+
+
+    def dot_products(self, v, chunk_rows=65536):
+        w = list(v.coordinates)
+        out = []
+        for start, values in self.chunks(chunk_rows):
+            if np is not None:
+                out.append(values @ np.asarray(w, dtype=np.float64))
+            else:
+                d = self.cols
+                out.extend(sum(x*y for x, y in zip(values[k:k+d], w)) for k in range(0, len(values), d))
+        if np is not None:
+            return np.concatenate(out) if out else np.empty(0)
+        return out
+
+
+class MappedSystem(_MappedRows):
+
+    def __init__(self, path):
+        super(MappedSystem, self).__init__(path, SYSTEM_MAGIC, NOT_A_SYSTEM_FILE_MSG)
+        self.dimension = self.cols - 1
+
+
+    def __getitem__(self, i):
+        row = self.row(i)
+        return Hyperplane.build(normal_vector=CompactVector(row[:self.dimension]), constant_term=row[self.dimension])
+
+
+    def residuals(self, x, chunk_rows=65536):
+        # |n.x - k| for every equation, streamed without building planes.
+        w = list(x.coordinates)
+        out = []
+        for start, values in self.chunks(chunk_rows):
+            if np is not None:
+                out.append(np.abs(values[:, :-1] @ np.asarray(w, dtype=np.float64) - values[:, -1]))
+            else:
+                c = self.cols
+                out.extend(abs(sum(a*b for a, b in zip(values[k:k+c-1], w)) - values[k+c-1])
+                           for k in range(0, len(values), c))
+        if np is not None:
+            return np.concatenate(out) if out else np.empty(0)
+        return out
+
+
+    def to_linear_system(self):
+        # The equations are copied into plain Vectors: the system is
+        # independent of the mapping and runs on every engine unchanged.
+        planes = []
+        for i in range(self.rows):
+            row = self.row(i)
+            planes.append(Hyperplane.build(normal_vector=Vector(row[:self.dimension].tolist()),
+                                           constant_term=row[self.dimension]))
+        return LinearSystem(planes)
+
+
+def load_vectors(path):
+    return MappedVectors(path)
+
+
+def load_system(path):
+    return MappedSystem(path)
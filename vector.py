@@ -1,12 +1,23 @@
 import math
 
+import kernels
+
 class Vector(object):
+
+    # Vectors are immutable: coordinates and dimension are read-only, so
+    # the norms, the unit direction and the hash can be cached on first use.
+    __slots__ = ('_coordinates', '_dimension', '_squared_magnitude', '_magnitude', '_direction', '_hash')
+
     def __init__(self, coordinates):
         try:
             if not coordinates:
                 raise ValueError
-            self.coordinates = tuple(coordinates)
-            self.dimension = len(coordinates)
+            self._coordinates = tuple(coordinates)
+            self._dimension = len(coordinates)
+            self._squared_magnitude = None
+            self._magnitude = None
+            self._direction = None
+            self._hash = None
 
         except ValueError:
             raise ValueError('The coordinates must be nonempty')
@@ -15,6 +26,16 @@ class Vector(object):
             raise TypeError('The coordinates must be an iterable')
 
 
+    @property
+    def coordinates(self):
+        return self._coordinates
+
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+
     def plus(self, v):
         new_coordinates = [x+y for x,y in zip(self.coordinates, v.coordinates)]
         return Vector(new_coordinates)
@@ -30,32 +51,39 @@ class Vector(object):
         return Vector(new_coordinates)
 
 
+    def squared_magnitude(self):
+        if self._squared_magnitude is None:
+            self._squared_magnitude = kernels.dot(self._coordinates, self._coordinates)
+        return self._squared_magnitude
+
+
     def magnitude(self):
-        sumOfSqrs = [x*x for x in self.coordinates]
-        return math.sqrt(sum(sumOfSqrs))
+        if self._magnitude is None:
+            self._magnitude = math.sqrt(self.squared_magnitude())
+        return self._magnitude
 
 
     def direction(self):
-        mag = self.magnitude()
-        if mag == 0:
-            print("No direction")
-            return None
-        new_coordinates = [x/mag for x in self.coordinates]
-        return Vector(new_coordinates)
+        if self._direction is None:
+            mag = self.magnitude()
+            if mag == 0:
+                print("No direction")
+                return None
+            new_coordinates = [x/mag for x in self.coordinates]
+            self._direction = Vector(new_coordinates)
+        return self._direction
 
 
     def dot_product(self, v):
-        products = [x*y for x, y in zip(self.coordinates, v.coordinates)]
-        return sum(products)
+        return kernels.dot(self.coordinates, v.coordinates)
 
 
     def angle(self, v):
-        mag1 = self.magnitude()
-        mag2 = v.magnitude()
-        if (mag1==0) or (mag2==0):
+        a2, b2, d = self._squared_terms(v)
+        if a2 == 0 or b2 == 0:
             print("No angle")
             return None
-        val = self.dot_product(v)/(mag1*mag2)
+        val = d/math.sqrt(a2*b2)
         if val>1:
             val = 1
         elif val<-1:
@@ -90,37 +118,78 @@ class Vector(object):
         return False
 
 
+    def _squared_terms(self, v):
+        # Squared norms come from the caches when both are known, leaving
+        # only the dot product to compute; otherwise one fused pass fills
+        # them in.
+        a2 = self._squared_magnitude
+        b2 = getattr(v, '_squared_magnitude', None)
+        if a2 is not None and b2 is not None:
+            return a2, b2, kernels.dot(self._coordinates, v.coordinates)
+        a2 = b2 = d = 0
+        for x, y in zip(self._coordinates, v.coordinates):
+            a2 += x*x
+            b2 += y*y
+            d += x*y
+        self._squared_magnitude = a2
+        if isinstance(v, Vector):
+            v._squared_magnitude = b2
+        return a2, b2, d
+
+
+    def is_parallel_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        if (a2<=abs_tol*abs_tol) or (b2<=abs_tol*abs_tol):
+            return True
+        return a2*b2 - d*d <= rel_tol*rel_tol*a2*b2
+
+
+    def is_orthogonal_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        if (a2<=abs_tol*abs_tol) or (b2<=abs_tol*abs_tol):
+            return True
+        return d*d <= rel_tol*rel_tol*a2*b2
+
+
     def parallel_projection_on(self, v):
-        dir = v.direction()
-        mag = self.dot_product(dir)
-        return dir.times_scalar(mag)
+        new_coordinates = kernels.projection(self.coordinates, v.coordinates)
+        if new_coordinates is None:
+            print("No direction")
+            return None
+        return Vector(new_coordinates)
 
 
     def orthognal_projection_on(self, v):
-        parallel = self.parallel_projection_on(v)
-        return self.minus(parallel)
+        new_coordinates = kernels.rejection(self.coordinates, v.coordinates)
+        if new_coordinates is None:
+            print("No direction")
+            return None
+        return Vector(new_coordinates)
 
 
     def cross_product(self, v):
+        a = self.coordinates
+        b = v.coordinates
         if (self.dimension == 2):
-            self.coordinates = self.coordinates +(0,)
-            v.coordinates = v.coordinates +(0,)
-            self.dimension += 1
-            v.dimension += 1
-        x = self.coordinates[1]*v.coordinates[2] - v.coordinates[1]*self.coordinates[2]
-        y = -(self.coordinates[0]*v.coordinates[2] - v.coordinates[0]*self.coordinates[2])
-        z = self.coordinates[0]*v.coordinates[1] - v.coordinates[0]*self.coordinates[1]
+            a = a +(0,)
+            b = tuple(b) +(0,)
+        x = a[1]*b[2] - b[1]*a[2]
+        y = -(a[0]*b[2] - b[0]*a[2])
+        z = a[0]*b[1] - b[0]*a[1]
         return Vector([x, y, z])
 
 
     def area_of_parallelogram_spanned_with(self, v):
-        cross = self.cross_product(v)
-        return cross.magnitude()
+        return kernels.cross_magnitude(self.coordinates, v.coordinates)
 
 
     def area_of_triangle_spanned_with(self, v):
-        cross = self.cross_product(v)
-        return (cross.magnitude()/2)
+        return kernels.cross_magnitude(self.coordinates, v.coordinates)/2
+
+
+    def lazy(self):
+        from lazy_vector import LazyVector
+        return LazyVector(self.coordinates)
 
 
     def __str__(self):
@@ -128,5 +197,16 @@ class Vector(object):
 
 
     def __eq__(self, v):
-        return self.coordinates == v.coordinates
+        # Anything without coordinates (the status strings solve() returns,
+        # say) is left to its own __eq__ and so compares unequal.
+        coordinates = getattr(v, 'coordinates', None)
+        if coordinates is None:
+            return NotImplemented
+        return self.coordinates == tuple(coordinates)
+
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._coordinates)
+        return self._hash
 
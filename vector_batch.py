@@ -0,0 +1,192 @@
+import math
+
+import numpy as np
+
+from vector import Vector
+
+
+class VectorBatch(object):
+
+    DIMENSIONS_MUST_MATCH_MSG = 'All vectors in the batch operation should live in the same dimension'
+    BATCH_SIZES_MUST_MATCH_MSG = 'Both batches should hold the same number of vectors'
+    CROSS_PRODUCT_DIM_MSG = 'Cross product is only defined in 2 or 3 dimensions'
+
+    def __init__(self, coordinates):
+        try:
+            coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise TypeError('The coordinates must be an N x d array of numbers')
+
+        if coordinates.ndim == 1:
+            coordinates = coordinates.reshape(1, -1)
+        if coordinates.ndim != 2 or coordinates.shape[1] == 0:
+            raise ValueError('The coordinates must be a nonempty N x d array')
+
+        self.coordinates = coordinates
+        self.dimension = coordinates.shape[1]
+
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        vectors = list(vectors)
+        if not vectors:
+            raise ValueError('The coordinates must be nonempty')
+        d = vectors[0].dimension
+        for v in vectors:
+            if v.dimension != d:
+                raise ValueError(cls.DIMENSIONS_MUST_MATCH_MSG)
+        return cls([v.coordinates for v in vectors])
+
+
+    def to_vectors(self):
+        return [Vector(row) for row in self.coordinates.tolist()]
+
+
+    def _operand(self, v):
+        # Vectors broadcast against every row; batches pair up row by row.
+        if isinstance(v, VectorBatch):
+            other = v.coordinates
+        elif isinstance(v, Vector):
+            other = np.asarray(v.coordinates, dtype=np.float64).reshape(1, -1)
+        else:
+            other = np.asarray(v, dtype=np.float64)
+            if other.ndim == 1:
+                other = other.reshape(1, -1)
+
+        if other.shape[1] != self.dimension:
+            raise ValueError(self.DIMENSIONS_MUST_MATCH_MSG)
+        if other.shape[0] not in (1, len(self)) and len(self) != 1:
+            raise ValueError(self.BATCH_SIZES_MUST_MATCH_MSG)
+        return other
+
+
+    def plus(self, v):
+        return VectorBatch(self.coordinates + self._operand(v))
+
+
+    def minus(self, v):
+        return VectorBatch(self.coordinates - self._operand(v))
+
+
+    def times_scalar(self, c):
+        c = np.asarray(c, dtype=np.float64)
+        if c.ndim == 1:
+            c = c.reshape(-1, 1)
+        return VectorBatch(self.coordinates * c)
+
+
+    def magnitude(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.coordinates, self.coordinates))
+
+
+    def direction(self):
+        # Zero vectors have no direction; their rows come back as NaN.
+        mag = self.magnitude()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_coordinates = self.coordinates / mag[:, None]
+        new_coordinates[mag == 0] = np.nan
+        return VectorBatch(new_coordinates)
+
+
+    def dot_product(self, v):
+        other = self._operand(v)
+        a, b = np.broadcast_arrays(self.coordinates, other)
+        return np.einsum('ij,ij->i', a, b)
+
+
+    def angle(self, v):
+        other = self._operand(v)
+        mag1 = self.magnitude()
+        mag2 = np.sqrt(np.einsum('ij,ij->i', other, other))
+        denominator = mag1 * mag2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            val = self.dot_product(other) / denominator
+        val = np.clip(val, -1, 1)
+        theta = np.arccos(val)
+        theta[np.broadcast_to(denominator == 0, theta.shape)] = np.nan
+        return theta
+
+
+    def parallel(self, v):
+        theta = self.angle(v)
+        with np.errstate(invalid='ignore'):
+            result = (np.abs(theta) < 0.0001) | (np.abs(theta - math.pi) < 0.0001)
+        return result | np.isnan(theta)
+
+
+    def orthognal(self, v):
+        theta = self.angle(v)
+        with np.errstate(invalid='ignore'):
+            result = np.abs(theta - (math.pi/2)) < 0.0001
+        return result | np.isnan(theta)
+
+
+    def _squared_terms(self, v):
+        other = self._operand(v)
+        a, b = np.broadcast_arrays(self.coordinates, other)
+        a2 = np.einsum('ij,ij->i', a, a)
+        b2 = np.einsum('ij,ij->i', b, b)
+        d = np.einsum('ij,ij->i', a, b)
+        return a2, b2, d
+
+
+    def is_parallel_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        zero = (a2 <= abs_tol*abs_tol) | (b2 <= abs_tol*abs_tol)
+        return zero | (a2*b2 - d*d <= rel_tol*rel_tol*a2*b2)
+
+
+    def is_orthogonal_to(self, v, rel_tol=1e-4, abs_tol=0.0):
+        a2, b2, d = self._squared_terms(v)
+        zero = (a2 <= abs_tol*abs_tol) | (b2 <= abs_tol*abs_tol)
+        return zero | (d*d <= rel_tol*rel_tol*a2*b2)
+
+
+    def parallel_projection_on(self, v):
+        dir = VectorBatch(self._operand(v)).direction()
+        mag = self.dot_product(dir)
+        return dir.times_scalar(mag)
+
+
+    def orthognal_projection_on(self, v):
+        parallel = self.parallel_projection_on(v)
+        return self.minus(parallel)
+
+
+    def cross_product(self, v):
+        a = self.coordinates
+        b = self._operand(v)
+        if self.dimension == 2:
+            a = np.pad(a, ((0, 0), (0, 1)))
+            b = np.pad(b, ((0, 0), (0, 1)))
+        elif self.dimension != 3:
+            raise ValueError(self.CROSS_PRODUCT_DIM_MSG)
+        return VectorBatch(np.cross(a, b))
+
+
+    def area_of_parallelogram_spanned_with(self, v):
+        cross = self.cross_product(v)
+        return cross.magnitude()
+
+
+    def area_of_triangle_spanned_with(self, v):
+        cross = self.cross_product(v)
+        return cross.magnitude()/2
+
+
+    def __len__(self):
+        return self.coordinates.shape[0]
+
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return VectorBatch(self.coordinates[i])
+        return Vector(self.coordinates[i].tolist())
+
+
+    def __str__(self):
+        return 'VectorBatch: {} vectors in {} dimensions\n{}'.format(len(self), self.dimension, self.coordinates)
+
+
+    def __eq__(self, v):
+        return np.array_equal(self.coordinates, v.coordinates)